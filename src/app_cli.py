@@ -1,11 +1,23 @@
 from argument_parser import parse_arguments
 from utils.credentials import load_api_credentials
-from commands import backtest_strategy, list_assets, run_strategy
+from commands import (
+    backtest_strategy,
+    list_assets,
+    prescreen_strategy,
+    prewarm_sentiment_cache,
+    run_strategy,
+    serve_sentiment,
+    sweep_strategy,
+)
 
 COMMANDS = {
     "list": list_assets,
     "run": run_strategy,
     "backtest": backtest_strategy,
+    "prescreen": prescreen_strategy,
+    "sweep": sweep_strategy,
+    "prewarm-sentiment": prewarm_sentiment_cache,
+    "serve-sentiment": serve_sentiment,
 }
 
 
@@ -220,10 +220,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import pandas as pd
 import backtrader as bt
 from utils.credentials import load_api_credentials
-from alpaca.data import (
-    CryptoHistoricalDataClient,
-)
-from alpaca.data.requests import CryptoBarsRequest
+from utils.bar_feeds import backtrader_feed
+from utils.bar_store import alpaca_crypto_downloader, load_bars
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 
@@ -349,25 +347,17 @@ def fetch_data(
     # df.set_index("timestamp", inplace=True)
     # print(df)
 
-    request = CryptoBarsRequest(
-        symbol_or_symbols=symbol,
-        timeframe=timeframe,
+    # Every timeframe is resampled locally from the cached minute bars
+    units = {TimeFrameUnit.Minute: "m", TimeFrameUnit.Hour: "h", TimeFrameUnit.Day: "d"}
+    df = load_bars(
+        symbol,
+        interval=f"{timeframe.amount}{units[timeframe.unit]}",
         start=fromdate,
         end=todate,
+        base_interval="1m",
+        downloader=alpaca_crypto_downloader,
     )
-    df = CryptoHistoricalDataClient().get_crypto_bars(request).df
-    timestamp = (
-        df.xs(symbol, level="symbol")
-        .index.to_frame(index=False)["timestamp"]
-        .apply(lambda x: int(x.timestamp() * 1000))
-        .to_frame()
-    )
-    df.index = pd.to_datetime(timestamp["timestamp"], unit="ms")
-    df = pd.DataFrame(
-        df, columns=["timestamp", "open", "high", "low", "close", "volume"]
-    )
-
-    return bt.feeds.PandasData(dataname=df)
+    return backtrader_feed(df)
 
 
 if __name__ == "__main__":
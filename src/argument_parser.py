@@ -2,6 +2,25 @@ import argparse
 from datetime import datetime, timezone, time
 from utils.broker_fees import BROKER_FEES
 from strategies.strategies import STRATEGIES
+from strategies.prescreen import PRESCREEN_INTERVALS, UNSCREENABLE
+from utils.sweep import SWEEP_METRICS, SWEEP_PARAMETERS
+from sentiment.backends import BACKENDS, DEFAULT_BACKEND
+from sentiment.estimate_sentiment import AGGREGATIONS
+from sentiment.inference_server import SOCKET_PATH
+
+# Options of the backtest command, with their destination, used by -wf only
+WALK_FORWARD_OPTIONS = [
+    ("--train_days", "train_days"),
+    ("--test_days", "test_days"),
+    ("-p", "param"),
+    ("-n", "samples"),
+    ("--seed", "seed"),
+    ("-w", "workers"),
+    ("-m", "metric"),
+    ("-i", "interval"),
+    ("--warmup_days", "warmup_days"),
+    ("-o", "output"),
+]
 
 
 def add_common_arguments(
@@ -10,13 +29,16 @@ def add_common_arguments(
     sleeptime_default="24H",
     days_prior_default=3,
     news_limit_default=10,
+    news_concurrency_default=4,
+    dedup_threshold_default=None,
+    aggregation_default="sum",
     strategy_choices=None,
     strategy_default="sentiment",
     tp_default=0.3,
     sl_default=0.1,
     sentiment_thr_default=0.9,
-    volatility_thr_default=0.01,
     volatility_period_default=7,
+    sentiment_backend_default=DEFAULT_BACKEND,
 ):
     parser.add_argument("symbol", type=str, help="Stock symbol to trade")
     parser.add_argument(
@@ -47,6 +69,29 @@ def add_common_arguments(
         default=news_limit_default,
         help=f"Limit of news fetched for the strategy (default: {news_limit_default})",
     )
+    parser.add_argument(
+        "-nc",
+        "--news_concurrency",
+        type=int,
+        default=news_concurrency_default,
+        help=f"Maximum number of concurrent news requests (default: {news_concurrency_default})",
+    )
+    parser.add_argument(
+        "-dd",
+        "--dedup_threshold",
+        type=float,
+        default=dedup_threshold_default,
+        help="Similarity (0-1) above which near-duplicate headlines are scored once "
+        f"(default: {dedup_threshold_default}, disabled)",
+    )
+    parser.add_argument(
+        "-ag",
+        "--sentiment_aggregation",
+        type=str,
+        choices=AGGREGATIONS,
+        default=aggregation_default,
+        help=f"Rule combining headline logits into a sentiment (default: {aggregation_default})",
+    )
     parser.add_argument(
         "-st",
         "--strategy",
@@ -76,13 +121,6 @@ def add_common_arguments(
         default=sentiment_thr_default,
         help=f"Sentiment threshold for making trading decisions (default: {sentiment_thr_default})",
     )
-    parser.add_argument(
-        "-vt",
-        "--volatility_threshold",
-        type=float,
-        default=volatility_thr_default,
-        help=f"Volatility threshold for trading decisions (default: {volatility_thr_default})",
-    )
     parser.add_argument(
         "-vp",
         "--volatility_period",
@@ -90,6 +128,81 @@ def add_common_arguments(
         default=volatility_period_default,
         help=f"Period over which to calculate volatility (default: {volatility_period_default} days)",
     )
+    parser.add_argument(
+        "-sb",
+        "--sentiment_backend",
+        type=str,
+        choices=list(BACKENDS.keys()),
+        default=sentiment_backend_default,
+        help=f"Inference backend for news sentiment (default: {sentiment_backend_default})",
+    )
+
+
+def add_date_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "-sd",
+        "--start_date",
+        type=lambda s: datetime.combine(datetime.strptime(s, "%Y-%m-%d"), time.min),
+        required=True,
+        help="Start date for backtest (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "-ed",
+        "--end_date",
+        type=lambda s: datetime.combine(datetime.strptime(s, "%Y-%m-%d"), time.max),
+        default=datetime.now(timezone.utc),
+        help="End date for backtest (YYYY-MM-DD, default: current date)",
+    )
+
+
+def add_sweep_arguments(parser: argparse.ArgumentParser, param_required=True):
+    parser.add_argument(
+        "-p",
+        "--param",
+        type=str,
+        action="append",
+        required=param_required,
+        help=f"Swept parameter NAME=SPEC, NAME in {', '.join(SWEEP_PARAMETERS)} and "
+        "SPEC a list a,b,c, a grid range low:high:step or a random range low:high",
+    )
+    parser.add_argument(
+        "-n",
+        "--samples",
+        type=int,
+        default=0,
+        help="Number of random combinations to draw instead of the full grid",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed of the random search"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent backtest processes (default: 4)",
+    )
+    parser.add_argument(
+        "-m",
+        "--metric",
+        type=str,
+        choices=list(SWEEP_METRICS.keys()),
+        default="sharpe",
+        help="Metric the results are ranked by (default: sharpe)",
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=str,
+        default="1d",
+        help="Interval of the bars the strategy is backtested on (default: 1d)",
+    )
+    parser.add_argument(
+        "--warmup_days",
+        type=int,
+        default=120,
+        help="Days of bars loaded before the start date for lookbacks (default: 120)",
+    )
 
 
 def parse_arguments():
@@ -116,21 +229,58 @@ def parse_arguments():
         "backtest", help="Run a backtest for the strategy"
     )
     add_common_arguments(backtest_parser)
+    add_date_arguments(backtest_parser)
     backtest_parser.add_argument(
-        "-sd",
-        "--start_date",
-        type=lambda s: datetime.combine(datetime.strptime(s, "%Y-%m-%d"), time.min),
-        required=True,
-        help="Start date for backtest (YYYY-MM-DD)",
+        "-f",
+        "--fees",
+        type=str,
+        choices=list(BROKER_FEES.keys()),
+        default="Alpaca",
+        help="Choose the broker fees model (default: Alpaca)",
     )
     backtest_parser.add_argument(
-        "-ed",
-        "--end_date",
-        type=lambda s: datetime.combine(datetime.strptime(s, "%Y-%m-%d"), time.max),
-        default=datetime.now(timezone.utc),
-        help="End date for backtest (YYYY-MM-DD, default: current date)",
+        "-wf",
+        "--walk_forward",
+        type=str,
+        choices=["rolling", "anchored"],
+        default=None,
+        help="Split the range into train/test windows run concurrently, with "
+        "rolling or anchored train windows",
+    )
+    backtest_parser.add_argument(
+        "--train_days",
+        type=int,
+        default=365,
+        help="Length in days of each walk-forward train window (default: 365)",
+    )
+    backtest_parser.add_argument(
+        "--test_days",
+        type=int,
+        default=90,
+        help="Length in days of each walk-forward test window (default: 90)",
     )
+    add_sweep_arguments(backtest_parser, param_required=False)
     backtest_parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="walk_forward_equity.csv",
+        help="CSV file of the stitched out-of-sample equity "
+        "(default: walk_forward_equity.csv)",
+    )
+
+    # Prescreen parser
+    prescreen_parser = subparsers.add_parser(
+        "prescreen",
+        help="Screen a strategy's signals with the vectorised backtester",
+    )
+    add_common_arguments(
+        prescreen_parser,
+        strategy_choices=list(PRESCREEN_INTERVALS) + list(UNSCREENABLE),
+        strategy_default="momentum",
+    )
+    add_date_arguments(prescreen_parser)
+    prescreen_parser.add_argument(
         "-f",
         "--fees",
         type=str,
@@ -138,5 +288,102 @@ def parse_arguments():
         default="Alpaca",
         help="Choose the broker fees model (default: Alpaca)",
     )
+    prescreen_parser.add_argument(
+        "--compare",
+        type=int,
+        default=0,
+        help="Number of sample ranges also backtested with lumibot (default: 0)",
+    )
+    prescreen_parser.add_argument(
+        "--sample_days",
+        type=int,
+        default=90,
+        help="Length in days of each compared sample range (default: 90)",
+    )
+    prescreen_parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="CSV file to write the equity curve to",
+    )
+
+    # Sweep parser
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Backtest a grid or random search of strategy parameters"
+    )
+    add_common_arguments(sweep_parser)
+    add_date_arguments(sweep_parser)
+    sweep_parser.add_argument(
+        "-f",
+        "--fees",
+        type=str,
+        choices=list(BROKER_FEES.keys()),
+        default="Alpaca",
+        help="Choose the broker fees model (default: Alpaca)",
+    )
+    add_sweep_arguments(sweep_parser)
+    sweep_parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="sweep_results.csv",
+        help="CSV file of the ranked results (default: sweep_results.csv)",
+    )
+    sweep_parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of best runs printed (default: 10)",
+    )
+
+    # Prewarm sentiment parser
+    prewarm_parser = subparsers.add_parser(
+        "prewarm-sentiment",
+        help="Fetch and score the news of a backtest range ahead of time",
+    )
+    add_common_arguments(prewarm_parser)
+    add_date_arguments(prewarm_parser)
+    prewarm_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of parallel fetch threads and scoring processes (default: 4)",
+    )
+
+    # Sentiment server parser
+    server_parser = subparsers.add_parser(
+        "serve-sentiment",
+        help="Serve sentiment inference to local strategy processes",
+    )
+    server_parser.add_argument(
+        "-sb",
+        "--sentiment_backend",
+        type=str,
+        choices=list(BACKENDS.keys()),
+        default=DEFAULT_BACKEND,
+        help=f"Inference backend for news sentiment (default: {DEFAULT_BACKEND})",
+    )
+    server_parser.add_argument(
+        "--socket",
+        type=str,
+        default=SOCKET_PATH,
+        help=f"Unix socket to listen on (default: {SOCKET_PATH})",
+    )
 
-    return parser, parser.parse_args()
+    args = parser.parse_args()
+    if args.mode == "backtest" and not args.walk_forward:
+        # These options only drive the walk-forward windows
+        given = [
+            option
+            for option, dest in WALK_FORWARD_OPTIONS
+            if getattr(args, dest) != backtest_parser.get_default(dest)
+        ]
+        if given:
+            backtest_parser.error(f"{', '.join(given)} only apply with -wf")
+    if args.mode == "prescreen" and args.strategy in UNSCREENABLE:
+        prescreen_parser.error(
+            f"{args.strategy} cannot be prescreened: {UNSCREENABLE[args.strategy]}"
+        )
+    return parser, args
@@ -0,0 +1,70 @@
+"""
+Compares loading minute bars from the legacy CSV cache and from the Parquet
+bar store. Uses a synthetic year of minute bars unless a cached symbol is given.
+
+    python src/bench_bar_store.py -n 500000
+"""
+
+from utils.bar_store import normalize_bars, read_bars, write_bars
+import argparse
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import time
+
+
+def synthetic_bars(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-4, rows)))
+    return pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 1e-4, rows)),
+            "High": close * 1.001,
+            "Low": close * 0.999,
+            "Close": close,
+            "Volume": rng.integers(100, 10000, rows),
+        },
+        index=pd.date_range("2023-01-01", periods=rows, freq="min", tz="UTC"),
+    )
+
+
+def best_of(repeats: int, load) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def load_csv(path: str) -> pd.DataFrame:
+    # What the CSV path has to do to get typed bars back
+    return normalize_bars(pd.read_csv(path, index_col=0, parse_dates=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs Parquet bar loading")
+    parser.add_argument("-n", "--rows", type=int, default=250000)
+    parser.add_argument("-r", "--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_bars(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "bars.csv")
+        parquet_path = os.path.join(directory, "bars.parquet")
+        df.to_csv(csv_path)
+        write_bars(normalize_bars(df), parquet_path)
+
+        csv_time = best_of(args.repeats, lambda: load_csv(csv_path))
+        parquet_time = best_of(args.repeats, lambda: read_bars(parquet_path))
+
+        print(f"{args.rows} minute bars")
+        print(
+            f"CSV:     {csv_time * 1000:.1f} ms ({os.path.getsize(csv_path) / 1e6:.1f} MB)"
+        )
+        print(
+            f"Parquet: {parquet_time * 1000:.1f} ms "
+            f"({os.path.getsize(parquet_path) / 1e6:.1f} MB), "
+            f"{csv_time / parquet_time:.1f}x faster"
+        )
@@ -1,42 +1,376 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from datetime import timedelta
 from lumibot.traders import Trader
-from lumibot.backtesting import YahooDataBacktesting
+from lumibot.backtesting import PandasDataBacktesting, YahooDataBacktesting
 from alpaca.trading import GetAssetsRequest
+from sentiment.estimate_sentiment import FinBert, warm_up
+from sentiment.inference_server import serve
+from sentiment.prewarm import prewarm_sentiment
+from strategies.prescreen import (
+    PRESCREEN_INTERVALS,
+    PRESCREEN_WARMUP,
+    consistency_report,
+    prescreen,
+    sample_ranges,
+    strategy_parameters,
+    summary_stats,
+)
+from strategies.strategies import STRATEGIES, parameter_names
+from utils.bar_store import load_bars
+from utils.shared_bars import SharedBars
+from utils.sweep import (
+    ParameterSpec,
+    check_specs,
+    grid_combinations,
+    random_combinations,
+    rank_results,
+    result_metrics,
+    strategy_overrides,
+)
+from utils.walk_forward import stitch_equity, walk_forward_windows
 from utils.utils import (
-    build_parameters,
+    attach_symbol_data,
     create_broker,
     create_strategy,
     create_trading_fees,
+    open_parameters,
 )
+import copy
+import pandas as pd
 
 
 def run_strategy(args: dict, credentials: dict):
     """Runs the given strategy using a Trader instance."""
+    if args.strategy == "sentiment":
+        # Load FinBERT while the broker and data sources are being set up
+        FinBert.set_backend(args.sentiment_backend)
+        warm_up()
     broker = create_broker(credentials)
-    parameters = build_parameters(args, credentials)
-    strategy = create_strategy(args.strategy, broker, parameters)
+    with open_parameters(args, credentials) as parameters:
+        strategy = create_strategy(args.strategy, broker, parameters)
 
-    trader = Trader()
-    trader.add_strategy(strategy)
-    trader.run_all()
+        trader = Trader()
+        trader.add_strategy(strategy)
+        trader.run_all()
 
 
 def backtest_strategy(args: dict, credentials: dict):
     """Backtests the given strategy over a specified date range."""
+    if args.walk_forward:
+        walk_forward_backtest(args, credentials)
+        return
+    if args.strategy == "sentiment":
+        # The model is only loaded if a news window misses the sentiment cache
+        FinBert.set_backend(args.sentiment_backend)
+    with open_parameters(args, credentials) as parameters:
+        _backtest(args, credentials, parameters, args.start_date, args.end_date)
+
+
+def _backtest(
+    args: dict,
+    credentials: dict,
+    parameters: dict,
+    start,
+    end,
+    datasource_class=YahooDataBacktesting,
+    **kwargs,
+):
+    """Runs one lumibot backtest and returns its results and strategy."""
     broker = create_broker(credentials)
-    parameters = build_parameters(args, credentials)
     trading_fees = create_trading_fees(args)
     strategy = create_strategy(args.strategy, broker, parameters)
 
-    strategy.backtest(
-        YahooDataBacktesting,
-        backtesting_start=args.start_date,
-        backtesting_end=args.end_date,
+    return strategy.run_backtest(
+        datasource_class,
+        backtesting_start=start,
+        backtesting_end=end,
         parameters=parameters,
         buy_trading_fees=trading_fees.get("buy_trading_fees", []),
         sell_trading_fees=trading_fees.get("sell_trading_fees", []),
+        **kwargs,
+    )
+
+
+def prescreen_strategy(args: dict, credentials: dict):
+    """Screens a strategy's signals with the vectorised engine, optionally against lumibot."""
+    with open_parameters(args, credentials) as parameters:
+        strategy_class = STRATEGIES[args.strategy]
+        trading_fees = create_trading_fees(args)
+        interval = PRESCREEN_INTERVALS[args.strategy]
+        bars = load_bars(
+            args.symbol,
+            interval=interval,
+            start=args.start_date - PRESCREEN_WARMUP[interval],
+            end=args.end_date,
+        )
+        screened_parameters = strategy_parameters(strategy_class, parameters)
+
+        result = prescreen(
+            args.strategy,
+            bars,
+            screened_parameters,
+            trading_fees,
+            trade_from=args.start_date,
+        )
+        print(f"Prescreen of {args.strategy} on {args.symbol}:")
+        for name, value in result.stats.items():
+            print(f"  {name}: {value:.4f}")
+        if args.output:
+            result.equity.to_csv(args.output)
+
+        for start, end in sample_ranges(
+            args.start_date, args.end_date, args.compare, args.sample_days
+        ):
+            sample = prescreen(
+                args.strategy,
+                bars[bars.index <= end],
+                screened_parameters,
+                trading_fees,
+                trade_from=start,
+            )
+            results, _ = _backtest(
+                args,
+                credentials,
+                parameters,
+                start,
+                end,
+                show_plot=False,
+                show_tearsheet=False,
+                save_tearsheet=False,
+            )
+            print(f"Consistency from {start:%Y-%m-%d} to {end:%Y-%m-%d}:")
+            print(consistency_report(sample.stats, results))
+
+
+def sweep_strategy(args: dict, credentials: dict):
+    """Backtests every combination of a parameter sweep across a process pool."""
+    combinations = _search_combinations(args)
+    print(f"{len(combinations)} backtests on up to {args.workers} workers")
+
+    rows = []
+    with SharedBars() as shared:
+        _share_warm_data(args, credentials, shared)
+        with _backtest_pool(args) as executor:
+            futures = {
+                executor.submit(
+                    _sweep_run, args, credentials, combination, shared.infos
+                ): combination
+                for combination in combinations
+            }
+            for future in as_completed(futures):
+                row = dict(futures[future])
+                try:
+                    row.update(future.result()[0])
+                except Exception as error:
+                    row["error"] = repr(error)
+                rows.append(row)
+                print(f"[{len(rows)}/{len(combinations)}] {row}")
+
+    table = rank_results(rows, args.metric)
+    table.to_csv(args.output, index=False)
+    print(table.head(args.top).to_string(index=False))
+    print(f"Results written to {args.output}")
+
+
+def walk_forward_backtest(args: dict, credentials: dict):
+    """
+    Backtests consecutive out-of-sample windows concurrently and stitches
+    their equity. With swept parameters, each window is tested with the
+    best combination of its train window.
+    """
+    windows = walk_forward_windows(
+        args.start_date,
+        args.end_date,
+        args.train_days,
+        args.test_days,
+        anchored=args.walk_forward == "anchored",
+    )
+    combinations = _search_combinations(args) if args.param else []
+    print(
+        f"{len(windows)} {args.walk_forward} windows, "
+        f"{len(combinations)} combinations trained per window"
+    )
+
+    train_rows = [[] for _ in windows]
+    tests = [None] * len(windows)
+    with SharedBars() as shared:
+        _share_warm_data(args, credentials, shared)
+        with _backtest_pool(args) as executor:
+
+            def submit(window: int, combination: dict, test: bool):
+                start, end = windows[window][2:] if test else windows[window][:2]
+                overrides = {**combination, "start_date": start, "end_date": end}
+                future = executor.submit(
+                    _sweep_run, args, credentials, overrides, shared.infos
+                )
+                futures[future] = (window, combination, test)
+
+            # Every train run at once; a window is tested as soon as it is trained
+            futures = {}
+            for window in range(len(windows)):
+                for combination in combinations:
+                    submit(window, combination, False)
+                if not combinations:
+                    submit(window, {}, True)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, combination, test = futures.pop(future)
+                    row = dict(combination)
+                    try:
+                        metrics, equity = future.result()
+                        row.update(metrics)
+                    except Exception as error:
+                        row["error"], equity = repr(error), None
+
+                    if test:
+                        tests[window] = (row, equity)
+                        print(f"Window {window + 1}/{len(windows)} tested: {row}")
+                        continue
+                    train_rows[window].append(row)
+                    if len(train_rows[window]) == len(combinations):
+                        best = rank_results(train_rows[window], args.metric).iloc[0]
+                        # Back to the Python types of the swept values
+                        submit(
+                            window,
+                            {
+                                name: type(value)(best[name])
+                                for name, value in combinations[0].items()
+                            },
+                            True,
+                        )
+
+    report = pd.DataFrame(
+        [
+            {
+                "train_start": window.train_start,
+                "test_start": window.test_start,
+                "test_end": window.test_end,
+                **row,
+            }
+            for window, (row, _) in zip(windows, tests)
+        ]
+    )
+    equity = stitch_equity([curve for _, curve in tests])
+    print(report.to_string(index=False))
+    if equity.empty:
+        print("No out-of-sample equity to stitch")
+        return
+    print("Out-of-sample:")
+    for name, value in summary_stats(equity).items():
+        print(f"  {name}: {value:.4f}")
+    equity.to_csv(args.output)
+    print(f"Stitched equity written to {args.output}")
+
+
+def _search_combinations(args: dict) -> list:
+    specs = [ParameterSpec(spec) for spec in args.param]
+    check_specs(specs, args.strategy, _strategy_parameter_names(args.strategy))
+    if args.samples:
+        return random_combinations(specs, args.samples, args.seed)
+    return grid_combinations(specs)
+
+
+def _strategy_parameter_names(strategy: str) -> list:
+    return sorted(parameter_names(STRATEGIES[strategy]))
+
+
+def _share_warm_data(args: dict, credentials: dict, shared: SharedBars):
+    """Warms the caches every backtest of a pool reads, and publishes the bars."""
+    if args.strategy == "sentiment":
+        # Workers then read every news window's sentiment from the cache
+        prewarm_sentiment_cache(args, credentials)
+
+    # Bars are downloaded once and shared with the workers
+    with open_parameters(args, credentials) as parameters:
+        symbols = parameters.get("symbols", [])
+    for symbol in sorted(set(symbols) | {args.symbol}):
+        bars = load_bars(
+            symbol,
+            interval=args.interval,
+            start=args.start_date - timedelta(days=args.warmup_days),
+            end=args.end_date,
+        )
+        shared.publish(symbol, bars)
+
+
+def _backtest_pool(args: dict) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_sweep_worker,
+        initargs=(args.sentiment_backend,),
     )
 
 
+def _init_sweep_worker(backend: str):
+    # The model is only loaded if a news window misses the sentiment cache
+    FinBert.set_backend(backend)
+
+
+def _sweep_run(args: dict, credentials: dict, overrides: dict, infos: dict):
+    """
+    One backtest of a pool over the bars shared by the parent process, with
+    some arguments overridden. Returns its metrics and daily equity.
+    """
+    args = copy.copy(args)
+    vars(args).update(overrides)
+    pandas_data = {}
+    for symbol, info in infos.items():
+        pandas_data.update(attach_symbol_data(symbol, info, args.interval)[0])
+
+    with open_parameters(args, credentials) as parameters:
+        parameters = {
+            **parameters,
+            **strategy_overrides(overrides, _strategy_parameter_names(args.strategy)),
+        }
+        results, strategy = _backtest(
+            args,
+            credentials,
+            parameters,
+            args.start_date,
+            args.end_date,
+            PandasDataBacktesting,
+            pandas_data=pandas_data,
+            show_plot=False,
+            show_tearsheet=False,
+            save_tearsheet=False,
+        )
+    returns = getattr(strategy, "_strategy_returns_df", None)
+    equity = returns["portfolio_value"] if returns is not None else None
+    return result_metrics(results), equity
+
+
+def prewarm_sentiment_cache(args: dict, credentials: dict):
+    """Fetches and scores the news of a backtest range ahead of the backtest."""
+    # The news windows are the sentiment strategy's, whatever -st says
+    args = copy.copy(args)
+    args.strategy = "sentiment"
+    with open_parameters(args, credentials) as parameters:
+        prewarm_sentiment(
+            parameters["get_news"],
+            parameters["symbols"],
+            parameters["news_limit"],
+            parameters["days_prior_for_news"],
+            args.start_date,
+            args.end_date,
+            workers=args.workers,
+            backend=args.sentiment_backend,
+            dedup_threshold=args.dedup_threshold,
+        )
+
+
+def serve_sentiment(args: dict, credentials: dict):
+    """Serves sentiment inference to the strategy processes of this machine."""
+    FinBert.set_backend(args.sentiment_backend)
+    serve(FinBert.get(), args.socket, FinBert.backend)
+
+
 def list_assets(args: dict, credentials: dict):
     """Lists all assets of a given class from the broker."""
     broker = create_broker(credentials)
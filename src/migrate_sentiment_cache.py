@@ -0,0 +1,27 @@
+"""
+Imports the per-window text files of cache/news/<SYMBOL>/ into the sentiment
+database.
+
+    python src/migrate_sentiment_cache.py --remove
+"""
+
+from sentiment.sentiment_db import SentimentDatabase, migrate_text_cache
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the text sentiment cache")
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default="./cache/news",
+        help="Directory of the text cache (default: ./cache/news)",
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="Delete the text files once imported",
+    )
+    args = parser.parse_args()
+
+    count = migrate_text_cache(SentimentDatabase.default(), args.cache_dir, args.remove)
+    print(f"Migrated {count} cached news windows")
@@ -0,0 +1,168 @@
+from typing import List
+import os
+
+MODEL_NAME = "ProsusAI/finbert"
+ONNX_MODEL_PATH = "./cache/models/finbert.onnx"
+MAX_TOKENS = 128  # Headlines are truncated to this many tokens
+TOKEN_BUDGET = 8192  # Padded tokens per model call
+
+
+def bucket_by_length(
+    lengths: List[int], token_budget: int = TOKEN_BUDGET
+) -> List[List[int]]:
+    """
+    Group indices into batches of similar length whose padded size
+    (batch size x longest length) stays within the token budget.
+    """
+    buckets, bucket = [], []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Indices come shortest first, so lengths[i] is the bucket's padded width
+        if bucket and lengths[i] * (len(bucket) + 1) > token_budget:
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(i)
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+class Backend:
+    """
+    Tokenizes headlines once (truncated to max_tokens), runs them through the
+    model in length-sorted buckets and returns the logits in the input order.
+    """
+
+    max_tokens = MAX_TOKENS
+    token_budget = TOKEN_BUDGET
+    tensor_type = "pt"
+
+    def logits(self, news: List[str]) -> List[List[float]]:
+        input_ids = self.tokenizer(news, truncation=True, max_length=self.max_tokens)[
+            "input_ids"
+        ]
+
+        logits = [None] * len(news)
+        for bucket in bucket_by_length(
+            [len(ids) for ids in input_ids], self.token_budget
+        ):
+            tokens = self.tokenizer.pad(
+                {"input_ids": [input_ids[i] for i in bucket]},
+                return_tensors=self.tensor_type,
+            )
+            for i, values in zip(bucket, self._forward(tokens)):
+                logits[i] = values
+        return logits
+
+    def _forward(self, tokens) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class TorchBackend(Backend):
+    """Full-precision PyTorch FinBERT (GPU when available)."""
+
+    def __init__(self):
+        # torch and transformers are imported here so that importing this
+        # module stays cheap for the strategies that never score news.
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        import torch
+
+        self.torch = torch
+        self.device = self._get_device()
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        self.model = self._prepare_model(model.eval()).to(self.device)
+
+    def _forward(self, tokens) -> List[List[float]]:
+        tokens = tokens.to(self.device)
+        with self.torch.inference_mode():
+            result = self.model(
+                tokens["input_ids"], attention_mask=tokens["attention_mask"]
+            )["logits"]
+        return result.cpu().tolist()
+
+    def _get_device(self) -> str:
+        return "cuda:0" if self.torch.cuda.is_available() else "cpu"
+
+    def _prepare_model(self, model):
+        return model
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch FinBERT with int8 dynamic quantisation of the linear layers (CPU only)."""
+
+    def _get_device(self) -> str:
+        return "cpu"
+
+    def _prepare_model(self, model):
+        return self.torch.quantization.quantize_dynamic(
+            model, {self.torch.nn.Linear}, dtype=self.torch.qint8
+        )
+
+
+class OnnxBackend(Backend):
+    """FinBERT exported once to ONNX and run with ONNX Runtime on CPU."""
+
+    tensor_type = "np"
+
+    def __init__(self, path: str = ONNX_MODEL_PATH):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError(
+                "The onnx sentiment backend requires onnxruntime and onnx: "
+                "pip install onnxruntime onnx"
+            )
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        if not os.path.exists(path):
+            self._export(path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def _forward(self, tokens) -> List[List[float]]:
+        return self.session.run(
+            ["logits"],
+            {
+                "input_ids": tokens["input_ids"].astype("int64"),
+                "attention_mask": tokens["attention_mask"].astype("int64"),
+            },
+        )[0].tolist()
+
+    def _export(self, path: str):
+        from transformers import AutoModelForSequenceClassification
+        import torch
+
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).eval()
+        model.config.return_dict = False
+        sample = self.tokenizer(["Stocks rally"], return_tensors="pt")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"Exporting {MODEL_NAME} to {path}")
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14,
+        )
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "torch-int8": QuantizedTorchBackend,
+    "onnx": OnnxBackend,
+}
+DEFAULT_BACKEND = "torch"
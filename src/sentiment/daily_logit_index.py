@@ -0,0 +1,171 @@
+from bisect import bisect_left, bisect_right
+from sentiment.estimate_sentiment import labels, softmax
+from typing import Dict, List, Optional, Tuple
+from multiprocessing import util
+import json
+import os
+import threading
+import time
+
+# Recorded windows are written to disk at most this often, and on exit
+SAVE_INTERVAL = 30
+
+
+class DailyLogitIndex:
+    """
+    Per-symbol index of the daily sums of headline logits.
+
+    Since the window sentiment is the softmax of the summed (or mean) logits,
+    any [from_date, to_date) window is the difference of two prefix sums. A window
+    is only answered when every day in it has been fully fetched (a fetch that
+    returned fewer articles than its limit) and its article count does not
+    exceed the limit, so the answer matches what the news API would return.
+    """
+
+    # Bumped when the meaning of the stored keys changes; older files are rebuilt
+    VERSION = 2
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, symbol: str, path: Optional[str] = None):
+        self.symbol = symbol
+        self.path = path or f"./cache/news/{symbol}/daily_logits.json"
+        self._lock = threading.Lock()
+        self.days: Dict[str, List[float]] = {}
+        # Ids of the articles counted in each day
+        self.keys: Dict[str, List[str]] = {}
+        self.complete: List[List[str]] = []
+        self._prefix = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load()
+        # Also runs when a multiprocessing worker exits, unlike atexit
+        util.Finalize(self, self.flush, exitpriority=10)
+
+    @classmethod
+    def for_symbol(cls, symbol: str) -> "DailyLogitIndex":
+        with cls._instances_lock:
+            if symbol not in cls._instances:
+                cls._instances[symbol] = cls(symbol)
+            return cls._instances[symbol]
+
+    def record(
+        self,
+        from_date: str,
+        to_date: str,
+        headlines: List[Tuple[str, str, List[float]]],
+        complete: bool,
+    ):
+        """
+        Add (day, article id, logits) entries fetched for [from_date, to_date).
+        Articles are told apart by id, as distinct articles may share a headline.
+        """
+        with self._lock:
+            for day, key, logits in headlines:
+                day_keys = self.keys.setdefault(day, [])
+                if key in day_keys:
+                    continue
+                day_keys.append(key)
+                totals = self.days.setdefault(day, [0.0] * (len(labels) + 1))
+                for i, value in enumerate(logits):
+                    totals[i] += value
+                totals[-1] += 1
+            if complete:
+                self._mark_complete(from_date, to_date)
+            self._prefix = None
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+                self._save()
+
+    def flush(self):
+        """Write the windows recorded since the last save."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def window(
+        self,
+        from_date: str,
+        to_date: str,
+        limit: Optional[int],
+        aggregation: str = "sum",
+    ) -> Optional[Tuple[float, str, int]]:
+        """Sentiment of [from_date, to_date), or None if the index cannot answer exactly."""
+        # Only the rules that depend on the summed logits alone can be answered
+        if aggregation not in ("sum", "mean"):
+            return None
+
+        with self._lock:
+            if not self._is_complete(from_date, to_date):
+                return None
+            days, prefix = self._get_prefix()
+            start = prefix[bisect_left(days, from_date)]
+            end = prefix[bisect_left(days, to_date)]
+
+        summed = [b - a for a, b in zip(start, end)]
+        count = int(round(summed[-1]))
+        if limit and count > limit:
+            return None
+        if count == 0:
+            return 0, labels[-1], 0
+        logits = summed[:-1]
+        if aggregation == "mean":
+            logits = [value / count for value in logits]
+        probabilities = softmax(logits)
+        index = probabilities.index(max(probabilities))
+        return probabilities[index], labels[index], count
+
+    def _get_prefix(self) -> Tuple[List[str], List[List[float]]]:
+        if self._prefix is None:
+            days = sorted(self.days)
+            prefix = [[0.0] * (len(labels) + 1)]
+            for day in days:
+                prefix.append([a + b for a, b in zip(prefix[-1], self.days[day])])
+            self._prefix = days, prefix
+        return self._prefix
+
+    def _is_complete(self, from_date: str, to_date: str) -> bool:
+        i = bisect_right([start for start, _ in self.complete], from_date) - 1
+        return i >= 0 and self.complete[i][1] >= to_date
+
+    def _mark_complete(self, from_date: str, to_date: str):
+        merged = []
+        for start, end in sorted(self.complete + [[from_date, to_date]]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.complete = merged
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as error:
+                print(f"Rebuilding the logit index of {self.symbol}: {error}")
+                return
+            if data.get("version") != self.VERSION:
+                return
+            self.days = data["days"]
+            self.keys = data["keys"]
+            self.complete = data["complete"]
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Readers in other processes only ever see a complete file
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "days": self.days,
+                    "keys": self.keys,
+                    "complete": self.complete,
+                },
+                f,
+            )
+        os.replace(temporary_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
@@ -0,0 +1,70 @@
+from sentiment.headline_store import normalize_headline
+from typing import List, Tuple
+import hashlib
+import math
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+_PRIME = (1 << 61) - 1
+
+_rng = np.random.RandomState(42)
+_A = _rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+
+def minhash(headline: str) -> np.ndarray:
+    """MinHash signature of the character shingles of a normalised headline."""
+    text = normalize_headline(headline)
+    shingles = {
+        text[i : i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))
+    }
+    # 32-bit base hashes keep a * x + b within uint64. CRC32 is avoided: its
+    # linearity correlates with the permutations and biases the estimate.
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(),
+                "little",
+            )
+            for shingle in shingles
+        ],
+        dtype=np.uint64,
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def collapse_near_duplicates(
+    headlines: List[str], threshold: float
+) -> Tuple[List[str], List[int]]:
+    """
+    Greedily group headlines whose estimated Jaccard similarity reaches the
+    threshold. Returns the representative headlines and, for every input
+    headline, the index of its representative.
+    """
+    representatives, signatures, owners = [], [], []
+    for headline in headlines:
+        signature = minhash(headline)
+        if signatures:
+            similarity = (np.array(signatures) == signature).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] >= threshold:
+                owners.append(best)
+                continue
+        owners.append(len(representatives))
+        representatives.append(headline)
+        signatures.append(signature)
+    return representatives, owners
+
+
+def duplicate_weights(owners: List[int]) -> List[float]:
+    """
+    Per-headline aggregation weights of collapsed groups. A group of m
+    near-duplicates weighs 1 + ln(m) in total, shared evenly by its
+    headlines: a widely syndicated story counts for more than a single
+    article, but not m times as much.
+    """
+    multiplicity = [0] * (max(owners) + 1 if owners else 0)
+    for owner in owners:
+        multiplicity[owner] += 1
+    return [(1 + math.log(multiplicity[o])) / multiplicity[o] for o in owners]
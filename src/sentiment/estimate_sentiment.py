@@ -1,26 +1,138 @@
-from typing import Tuple, List
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+from typing import List, Optional, Tuple
+from sentiment.backends import BACKENDS, DEFAULT_BACKEND
+from sentiment.headline_store import HeadlineStore, headline_key
+from sentiment.inference_server import is_server_available, remote_logits
+import math
+import threading
 
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
-
-tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert").to(
-    device
-)
 labels = ["positive", "negative", "neutral"]
+AGGREGATIONS = ["sum", "mean", "mean_probabilities", "no_neutral"]
+
+
+class FinBert:
+    """The FinBERT inference backend, loaded once on first use."""
+
+    backend = DEFAULT_BACKEND
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = BACKENDS[cls.backend]()
+        return cls._instance
+
+    @classmethod
+    def set_backend(cls, backend: str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend: {backend}")
+        with cls._lock:
+            if cls._instance is not None and backend != cls.backend:
+                raise ValueError(f"Sentiment backend already loaded as {cls.backend}")
+            cls.backend = backend
+
+
+def warm_up(background: bool = True) -> threading.Thread:
+    """Load the model ahead of the first estimate_sentiment call."""
+    thread = threading.Thread(target=_warm_up, name="finbert-warm-up", daemon=True)
+    thread.start()
+    if not background:
+        thread.join()
+    return thread
+
+
+def _warm_up():
+    # A server of another backend is only found out on the first request
+    if not is_server_available():
+        FinBert.get()
 
 
 def estimate_sentiment(news: List[str]) -> Tuple[float, str]:
     if not news:
         return 0, labels[-1]
 
-    tokens = tokenizer(news, return_tensors="pt", padding=True).to(device)
+    return aggregate_logits(estimate_logits(news))
+
+
+def estimate_logits(news: List[str]) -> List[List[float]]:
+    """Per-headline logits, running the model only on headlines never scored before."""
+    store = HeadlineStore.default()
+    keys = [headline_key(headline) for headline in news]
+    logits_by_key = store.get_many(keys)
+
+    missing = {}
+    for key, headline in zip(keys, news):
+        if key not in logits_by_key:
+            missing.setdefault(key, headline)
+
+    if missing:
+        scored = dict(zip(missing.keys(), _run_model(list(missing.values()))))
+        store.put_many(scored)
+        logits_by_key.update(scored)
+
+    return [logits_by_key[key] for key in keys]
+
+
+def aggregate_logits(
+    logits: List[List[float]],
+    aggregation: str = "sum",
+    weights: Optional[List[float]] = None,
+) -> Tuple[float, str]:
+    """Most likely label of the batch and its probability, under an aggregation rule."""
+    if aggregation == "no_neutral":
+        neutral = labels.index("neutral")
+        kept = [i for i, l in enumerate(logits) if l.index(max(l)) != neutral]
+        logits = [logits[i] for i in kept]
+        weights = None if weights is None else [weights[i] for i in kept]
+    if not logits:
+        return 0, labels[-1]
+
+    probabilities = aggregate_probabilities(logits, aggregation, weights)
+    index = probabilities.index(max(probabilities))
+    return probabilities[index], labels[index]
+
+
+def aggregate_probabilities(
+    logits: List[List[float]],
+    aggregation: str = "sum",
+    weights: Optional[List[float]] = None,
+) -> List[float]:
+    """
+    Class probabilities of a batch of headline logits:
+    - sum: softmax of the summed logits (the original rule)
+    - mean: softmax of the mean logits
+    - mean_probabilities: mean of the per-headline softmax
+    - no_neutral: sum rule over the headlines not classified neutral
+    Headlines count once each unless given weights.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown sentiment aggregation: {aggregation}")
+    if weights is None:
+        weights = [1.0] * len(logits)
+
+    if aggregation == "mean_probabilities":
+        rows = [[w * p for p in softmax(l)] for l, w in zip(logits, weights)]
+        return [sum(column) / sum(weights) for column in zip(*rows)]
+
+    weighted = [[w * value for value in l] for l, w in zip(logits, weights)]
+    summed = [sum(column) for column in zip(*weighted)]
+    if aggregation == "mean":
+        summed = [value / sum(weights) for value in summed]
+    return softmax(summed)
+
+
+def softmax(values: List[float]) -> List[float]:
+    top = max(values)
+    exps = [math.exp(value - top) for value in values]
+    total = sum(exps)
+    return [value / total for value in exps]
+
 
-    result = model(tokens["input_ids"], attention_mask=tokens["attention_mask"])[
-        "logits"
-    ]
-    result = torch.nn.functional.softmax(torch.sum(result, 0), dim=-1)
-    probability = result[torch.argmax(result)]
-    sentiment = labels[torch.argmax(result)]
-    return probability, sentiment
+def _run_model(news: List[str]) -> List[List[float]]:
+    # Use the shared inference server when one is running
+    logits = remote_logits(news, backend=FinBert.backend)
+    if logits is None:
+        logits = FinBert.get().logits(news)
+    return logits
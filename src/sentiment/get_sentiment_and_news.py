@@ -1,26 +1,155 @@
-from sentiment.estimate_sentiment import estimate_sentiment
+from sentiment.estimate_sentiment import aggregate_logits, estimate_logits
+from sentiment.daily_logit_index import DailyLogitIndex
+from sentiment.dedup import collapse_near_duplicates, duplicate_weights
+from sentiment.headline_store import HeadlineStore, headline_key
 from alpaca_trade_api import REST
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 
 class GetSentimentAndNews:
-    def __init__(self, symbol: str, limit: int, get_news: REST.get_news):
+    # Near-duplicate headlines that did not need a model forward pass this run
+    forward_passes_saved = 0
+
+    def __init__(
+        self,
+        symbol: str,
+        limit: int,
+        get_news: REST.get_news,
+        dedup_threshold: Optional[float] = None,
+        aggregation: str = "sum",
+    ):
         self.symbol = symbol
         self.get_news = get_news
         self.limit = limit
+        self.dedup_threshold = dedup_threshold
+        self.aggregation = aggregation
+        # Collapsed groups can span windows, so their weights depend on the
+        # window and the per-day sums of the index do not apply
+        self.index = None if dedup_threshold else DailyLogitIndex.for_symbol(symbol)
 
     def get_news_and_sentiment(
         self, dates: Tuple[str, str]
     ) -> Tuple[List[str], float, str, int]:
-        news_headlines = self._fetch_news_headlines(dates)
+        return self.get_news_and_sentiment_many([self], dates)[0]
+
+    @staticmethod
+    def get_news_and_sentiment_many(
+        fetchers: List["GetSentimentAndNews"], dates: Tuple[str, str]
+    ) -> List[Tuple[List[str], float, str, int]]:
+        """
+        Same as get_news_and_sentiment for several symbols, with the headlines
+        of every symbol scored in a single model call.
+        """
+        results = [fetcher._lookup(dates) for fetcher in fetchers]
+        pending = [i for i, result in enumerate(results) if result is None]
+
+        news = dict(
+            zip(pending, _fetch_news_many([fetchers[i] for i in pending], dates))
+        )
+        headlines = {
+            i: [ev.__dict__["_raw"]["headline"] for ev in news[i]] for i in pending
+        }
+
+        collapsed = {i: fetchers[i]._collapse(headlines[i]) for i in pending}
+        logits = estimate_logits([h for i in pending for h in collapsed[i][0]])
+
+        start = 0
+        for i in pending:
+            representatives, owners, weights = collapsed[i]
+            end = start + len(representatives)
+            # Near-duplicates take the logits of their representative and share
+            # the weight of their group
+            window_logits = [logits[start + owner] for owner in owners]
+            results[i] = fetchers[i]._score(
+                dates, news[i], headlines[i], window_logits, weights
+            )
+            start = end
+
+        return results
+
+    def _collapse(
+        self, news_headlines: List[str]
+    ) -> Tuple[List[str], List[int], Optional[List[float]]]:
+        """
+        Representative headlines and, per headline, the index of its
+        representative and its aggregation weight (None when not collapsing).
+        """
+        if not self.dedup_threshold:
+            return news_headlines, list(range(len(news_headlines))), None
+
+        representatives, owners = collapse_near_duplicates(
+            news_headlines, self.dedup_threshold
+        )
+        kept = set(headline_key(h) for h in representatives)
+        dropped = [headline_key(h) for h in news_headlines]
+        dropped = [key for key in dropped if key not in kept]
+        already_scored = HeadlineStore.default().get_many(dropped)
+        GetSentimentAndNews.forward_passes_saved += len(
+            [key for key in dropped if key not in already_scored]
+        )
+        return representatives, owners, duplicate_weights(owners)
+
+    def _lookup(
+        self, dates: Tuple[str, str]
+    ) -> Optional[Tuple[List[str], float, str, int]]:
+        """Answer the window without fetching news, or None."""
+        to_date, from_date = dates
+
+        # Windows made of fully fetched days need neither news nor inference
+        if self.index is None:
+            return None
+        indexed = self.index.window(from_date, to_date, self.limit, self.aggregation)
+        if indexed is None:
+            return None
+        probability, sentiment, num_headlines = indexed
+        return [], probability, sentiment, num_headlines
+
+    def _score(
+        self,
+        dates: Tuple[str, str],
+        news: list,
+        news_headlines: List[str],
+        logits: List[List[float]],
+        weights: Optional[List[float]] = None,
+    ) -> Tuple[List[str], float, str, int]:
+        to_date, from_date = dates
+        if self.index is not None:
+            self.index.record(
+                from_date,
+                to_date,
+                [
+                    (
+                        ev.__dict__["_raw"]["created_at"][:10],
+                        str(ev.__dict__["_raw"]["id"]),
+                        l,
+                    )
+                    for ev, l in zip(news, logits)
+                ],
+                complete=not self.limit or len(news) < self.limit,
+            )
 
-        probability, sentiment = estimate_sentiment(news_headlines)
+        probability, sentiment = aggregate_logits(logits, self.aggregation, weights)
 
         return news_headlines, probability, sentiment, len(news_headlines)
 
-    def _fetch_news_headlines(self, dates: Tuple[str, str]) -> List[str]:
+    def _fetch_news(self, dates: Tuple[str, str]) -> list:
+        return self.get_news(**self._news_request(dates))
+
+    def _news_request(self, dates: Tuple[str, str]) -> dict:
         to_date, from_date = dates
-        news = self.get_news(
-            symbol=self.symbol, start=from_date, end=to_date, limit=self.limit
-        )
-        return [ev.__dict__["_raw"]["headline"] for ev in news]
+        return {
+            "symbol": self.symbol,
+            "start": from_date,
+            "end": to_date,
+            "limit": self.limit,
+        }
+
+
+def _fetch_news_many(
+    fetchers: List[GetSentimentAndNews], dates: Tuple[str, str]
+) -> List[list]:
+    """Fetch the news of every fetcher, concurrently when their client supports it."""
+    get_news_many = fetchers and getattr(fetchers[0].get_news, "get_news_many", None)
+    if get_news_many and all(f.get_news is fetchers[0].get_news for f in fetchers):
+        return get_news_many([fetcher._news_request(dates) for fetcher in fetchers])
+    return [fetcher._fetch_news(dates) for fetcher in fetchers]
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List
+
+HEADLINE_STORE_PATH = "./cache/news/headlines.jsonl"
+
+
+def normalize_headline(headline: str) -> str:
+    """Lowercase and collapse whitespace (FinBERT is uncased, so this is lossless)."""
+    return " ".join(headline.lower().split())
+
+
+def headline_key(headline: str) -> str:
+    return hashlib.sha1(normalize_headline(headline).encode("utf-8")).hexdigest()
+
+
+class HeadlineStore:
+    """
+    Raw FinBERT logits per headline, keyed by a hash of the normalised text.
+    Shared by every symbol and news window, so a headline is scored only once.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: str = HEADLINE_STORE_PATH):
+        self.path = path
+        self._logits = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "HeadlineStore":
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        logits = self._load()
+        return {key: logits[key] for key in keys if key in logits}
+
+    def put_many(self, logits_by_key: Dict[str, List[float]]):
+        with self._lock:
+            logits = self._load()
+            new = {k: v for k, v in logits_by_key.items() if k not in logits}
+            if not new:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                for key, values in new.items():
+                    f.write(json.dumps({"key": key, "logits": values}) + "\n")
+            logits.update(new)
+
+    def __len__(self):
+        return len(self._load())
+
+    def _load(self) -> Dict[str, List[float]]:
+        if self._logits is None:
+            logits = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            logits[entry["key"]] = entry["logits"]
+            self._logits = logits
+        return self._logits
@@ -0,0 +1,163 @@
+from queue import Empty, Queue
+from typing import List, Optional
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+SOCKET_PATH = "./cache/sentiment.sock"
+# Seconds a client waits for its logits before scoring locally instead
+REMOTE_TIMEOUT = 120
+
+# Servers that timed out in this process, not asked again
+_unresponsive = set()
+
+
+class _Request:
+    def __init__(self, headlines: List[str]):
+        self.headlines = headlines
+        self.logits = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves FinBERT logits over a Unix socket to any number of strategy
+    processes. Requests arriving within max_delay of each other are scored
+    together in one model call.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        backend,
+        socket_path: str = SOCKET_PATH,
+        max_delay: float = 0.01,
+        max_batch_size: int = 512,
+        backend_name: Optional[str] = None,
+    ):
+        self.backend = backend
+        # Clients asking for another backend are turned away
+        self.backend_name = backend_name
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.requests = Queue()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+        super().__init__(socket_path, _Handler)
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def score(self, headlines: List[str]) -> List[List[float]]:
+        request = _Request(headlines)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.logits
+
+    def _batch_loop(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0].headlines)
+            deadline = time.monotonic() + self.max_delay
+            while size < self.max_batch_size:
+                try:
+                    request = self.requests.get(
+                        timeout=max(0, deadline - time.monotonic())
+                    )
+                except Empty:
+                    break
+                batch.append(request)
+                size += len(request.headlines)
+
+            try:
+                logits = self.backend.logits(
+                    [headline for request in batch for headline in request.headlines]
+                )
+            except Exception as e:
+                for request in batch:
+                    request.error = str(e)
+                    request.done.set()
+                continue
+
+            start = 0
+            for request in batch:
+                end = start + len(request.headlines)
+                request.logits = logits[start:end]
+                request.done.set()
+                start = end
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                backend = request.get("backend")
+                if backend and self.server.backend_name not in (None, backend):
+                    response = {
+                        "rejected": f"serving the {self.server.backend_name} "
+                        f"backend, not {backend}"
+                    }
+                else:
+                    response = {"logits": self.server.score(request["headlines"])}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+def serve(backend, socket_path: str = SOCKET_PATH, backend_name: Optional[str] = None):
+    with InferenceServer(backend, socket_path, backend_name=backend_name) as server:
+        print(f"Serving sentiment inference on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def is_server_available(socket_path: str = SOCKET_PATH) -> bool:
+    return socket_path not in _unresponsive and os.path.exists(socket_path)
+
+
+def remote_logits(
+    headlines: List[str],
+    socket_path: str = SOCKET_PATH,
+    backend: Optional[str] = None,
+    timeout: float = REMOTE_TIMEOUT,
+) -> Optional[List[List[float]]]:
+    """
+    Logits from the inference server, or None when it is not running, does
+    not answer within timeout, or serves another backend than the one asked.
+    """
+    if not is_server_available(socket_path):
+        return None
+    request = {"headlines": headlines}
+    if backend:
+        request["backend"] = backend
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            with client.makefile("rwb") as stream:
+                stream.write((json.dumps(request) + "\n").encode())
+                stream.flush()
+                response = json.loads(stream.readline())
+    except socket.timeout:
+        print(f"Sentiment inference server timed out after {timeout}s, scoring locally")
+        _unresponsive.add(socket_path)
+        return None
+    except (ConnectionError, FileNotFoundError, ValueError):
+        return None
+    if "rejected" in response:
+        print(f"Sentiment inference server is {response['rejected']}, scoring locally")
+        _unresponsive.add(socket_path)
+        return None
+    if "error" in response:
+        raise RuntimeError(f"Sentiment inference server: {response['error']}")
+    return response["logits"]
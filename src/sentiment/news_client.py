@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from alpaca_trade_api.entity_v2 import NewsV2
+from requests.adapters import HTTPAdapter
+from typing import List
+import os
+import requests
+
+DATA_URL = os.getenv("APCA_API_DATA_URL", "https://data.alpaca.markets")
+PAGE_LIMIT = 50
+
+
+class NewsClient:
+    """
+    Client for the Alpaca news endpoint, callable like REST.get_news.
+    All requests share one keep-alive connection pool, and get_news_many
+    fetches several windows in parallel, at most max_concurrency at a time.
+    Close it, or use it as a context manager, to stop its threads.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        secret_key: str,
+        data_url: str = DATA_URL,
+        max_concurrency: int = 4,
+        timeout: float = 30,
+    ):
+        self.url = f"{data_url.rstrip('/')}/v1beta1/news"
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.session = requests.Session()
+        self.session.headers.update(
+            {"APCA-API-KEY-ID": key_id, "APCA-API-SECRET-KEY": secret_key}
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="news"
+        )
+
+    def __call__(
+        self, symbol: str, start=None, end=None, limit: int = 10, **kwargs
+    ) -> List[NewsV2]:
+        """Articles of a symbol, newest first, following pagination up to limit."""
+        params = {"symbols": symbol, "sort": "desc", **kwargs}
+        if start is not None:
+            params["start"] = str(start)
+        if end is not None:
+            params["end"] = str(end)
+
+        news = []
+        while True:
+            params["limit"] = (
+                min(limit - len(news), PAGE_LIMIT) if limit else PAGE_LIMIT
+            )
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            body = response.json()
+            news.extend(NewsV2(raw) for raw in body.get("news") or [])
+
+            page_token = body.get("next_page_token")
+            if not page_token or (limit and len(news) >= limit):
+                return news
+            params["page_token"] = page_token
+
+    def get_news_many(self, calls: List[dict]) -> List[List[NewsV2]]:
+        """Runs each dict of get_news keyword arguments concurrently."""
+        return list(self._executor.map(lambda kwargs: self(**kwargs), calls))
+
+    def close(self):
+        """Stops the fetch threads and closes the connection pool."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self) -> "NewsClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
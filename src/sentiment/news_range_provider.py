@@ -0,0 +1,124 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from alpaca_trade_api import REST
+from typing import Dict, List, Tuple
+import threading
+
+
+def _to_datetime(value) -> datetime:
+    """Parse the API's date or timestamp formats into an aware UTC datetime."""
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+class RangeNewsProvider:
+    """
+    Drop-in replacement for REST.get_news that downloads the news of a symbol
+    for the whole backtest span once, keeps it sorted by creation time and
+    serves each window by binary search. Windows keep the API semantics:
+    inclusive bounds, newest first, at most `limit` articles.
+    """
+
+    def __init__(self, get_news: REST.get_news, start, end):
+        self._get_news = get_news
+        self.start = _to_datetime(start)
+        self.end = _to_datetime(end)
+        self._news: Dict[str, Tuple[List[datetime], list]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol: str, start=None, end=None, limit: int = 10, **kwargs):
+        if not self._covers(start, end, **kwargs):
+            return self._get_news(
+                symbol=symbol, start=start, end=end, limit=limit, **kwargs
+            )
+
+        window_start = _to_datetime(start) if start is not None else self.start
+        window_end = _to_datetime(end) if end is not None else self.end
+        times, news = self._load(symbol)
+        lo = bisect_left(times, window_start)
+        hi = bisect_right(times, window_end)
+        window = news[lo:hi][::-1]
+        return window[:limit] if limit else window
+
+    def get_news_many(self, calls: List[dict]) -> list:
+        """
+        Same as calling each dict of keyword arguments in turn, with the
+        ranges of the symbols not loaded yet downloaded concurrently when the
+        wrapped client has get_news_many.
+        """
+        get_news_many = getattr(self._get_news, "get_news_many", None)
+        with self._lock:
+            missing = {call["symbol"] for call in calls if self._covers(**call)}
+            missing = sorted(missing - set(self._news))
+        if get_news_many and len(missing) > 1:
+            ranges = get_news_many([self._range_request(s) for s in missing])
+            for symbol, news in zip(missing, ranges):
+                self._store(symbol, news)
+        return [self(**call) for call in calls]
+
+    def close(self):
+        """Closes the wrapped client, when it can be closed."""
+        close = getattr(self._get_news, "close", None)
+        if close:
+            close()
+
+    def __enter__(self) -> "RangeNewsProvider":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _covers(self, start=None, end=None, symbol=None, limit=None, **kwargs) -> bool:
+        """Whether a window can be served from the downloaded range."""
+        window_start = _to_datetime(start) if start is not None else self.start
+        window_end = _to_datetime(end) if end is not None else self.end
+        return not kwargs and self.start <= window_start and window_end <= self.end
+
+    def _load(self, symbol: str) -> Tuple[List[datetime], list]:
+        with self._symbol_lock(symbol):
+            if symbol not in self._news:
+                news = self._get_news(**self._range_request(symbol))
+                self._news[symbol] = self._sort(symbol, news)
+            return self._news[symbol]
+
+    def _store(self, symbol: str, news: list):
+        with self._symbol_lock(symbol):
+            # Another thread may have loaded the symbol meanwhile
+            if symbol not in self._news:
+                self._news[symbol] = self._sort(symbol, news)
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _range_request(self, symbol: str) -> dict:
+        return {
+            "symbol": symbol,
+            "start": self.start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end": self.end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "limit": None,
+        }
+
+    @staticmethod
+    def _sort(symbol: str, news: list) -> Tuple[List[datetime], list]:
+        news = sorted(
+            news, key=lambda ev: _to_datetime(ev.__dict__["_raw"]["created_at"])
+        )
+        times = [_to_datetime(ev.__dict__["_raw"]["created_at"]) for ev in news]
+        print(f"Fetched {len(news)} news for {symbol}")
+        return times, news
+
+
+def range_news_provider(get_news: REST.get_news, start, end, days_prior: int):
+    """RangeNewsProvider covering the news windows of a backtest from start to end."""
+    return RangeNewsProvider(
+        get_news,
+        _to_datetime(start) - timedelta(days=days_prior),
+        _to_datetime(end) + timedelta(days=1),
+    )
@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sentiment.estimate_sentiment import FinBert
+from sentiment.get_sentiment_and_news_cached import GetSentimentAndNewsCached
+from sentiment.headline_store import HeadlineStore, headline_key
+from sentiment.sentiment_db import SentimentDatabase
+from alpaca_trade_api import REST
+from typing import List, Optional, Tuple
+import os
+
+
+def enumerate_windows(
+    start_date: datetime, end_date: datetime, days_prior: int
+) -> List[Tuple[str, str]]:
+    """The (to_date, from_date) news windows a daily backtest asks for, weekdays only."""
+    windows = []
+    day = start_date.date()
+    while day <= end_date.date():
+        if day.weekday() < 5:
+            windows.append(
+                (
+                    day.strftime("%Y-%m-%d"),
+                    (day - timedelta(days=days_prior)).strftime("%Y-%m-%d"),
+                )
+            )
+        day += timedelta(days=1)
+    return windows
+
+
+def prewarm_sentiment(
+    get_news: REST.get_news,
+    symbols: List[str],
+    news_limit: int,
+    days_prior: int,
+    start_date: datetime,
+    end_date: datetime,
+    workers: int = 4,
+    backend: str = "torch",
+    batch_size: int = 256,
+    dedup_threshold: Optional[float] = None,
+):
+    """
+    Fetches the news of every (symbol, window) of a backtest and scores all new
+    headlines in large batches across a process pool, then fills the window
+    cache so that the backtest itself runs without inference.
+    """
+    windows = enumerate_windows(start_date, end_date, days_prior)
+    if not windows:
+        return
+
+    database = SentimentDatabase.default()
+    pending = []
+    for symbol in symbols:
+        fetcher = GetSentimentAndNewsCached(
+            symbol, news_limit, get_news, dedup_threshold
+        )
+        cached = database.get_windows(
+            symbol,
+            windows[0][0],
+            windows[-1][0],
+            news_limit,
+            dedup_threshold=dedup_threshold,
+        )
+        pending.extend(
+            (fetcher, dates)
+            for dates in windows
+            if dates not in cached and fetcher._lookup(dates) is None
+        )
+    print(f"{len(pending)} of {len(symbols) * len(windows)} news windows to fetch")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        news = list(executor.map(lambda r: r[0]._fetch_news(r[1]), pending))
+    headlines = [[ev.__dict__["_raw"]["headline"] for ev in n] for n in news]
+    collapsed = [f._collapse(h) for (f, _), h in zip(pending, headlines)]
+
+    store = HeadlineStore.default()
+    unscored = {}
+    for headline in (h for representatives, _, _ in collapsed for h in representatives):
+        unscored.setdefault(headline_key(headline), headline)
+    for key in store.get_many(list(unscored)):
+        del unscored[key]
+    print(f"{len(unscored)} new headlines to score")
+
+    keys, texts = list(unscored.keys()), list(unscored.values())
+    chunks = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(backend, workers),
+        ) as executor:
+            scored = list(executor.map(_score_chunk, chunks))
+    else:
+        FinBert.set_backend(backend)
+        scored = [_score_chunk(chunk) for chunk in chunks]
+    store.put_many(dict(zip(keys, (l for chunk in scored for l in chunk))))
+
+    # Every headline is now in the store, so this only aggregates and caches
+    logits_by_key = store.get_many(
+        headline_key(h) for representatives, _, _ in collapsed for h in representatives
+    )
+    for (
+        (fetcher, dates),
+        window_news,
+        window_headlines,
+        (
+            representatives,
+            owners,
+            weights,
+        ),
+    ) in zip(pending, news, headlines, collapsed):
+        fetcher._score(
+            dates,
+            window_news,
+            window_headlines,
+            [logits_by_key[headline_key(representatives[o])] for o in owners],
+            weights,
+        )
+    if dedup_threshold:
+        print(
+            f"Near-duplicate collapsing saved "
+            f"{GetSentimentAndNewsCached.forward_passes_saved} forward passes"
+        )
+
+
+def _init_worker(backend: str, workers: int):
+    import torch
+
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    FinBert.set_backend(backend)
+
+
+def _score_chunk(headlines: List[str]) -> List[List[float]]:
+    return FinBert.get().logits(headlines)
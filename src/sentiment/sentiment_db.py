@@ -0,0 +1,324 @@
+from sentiment.estimate_sentiment import aggregate_logits, aggregate_probabilities
+from sentiment.headline_store import HeadlineStore, headline_key
+from typing import Dict, List, Optional, Tuple
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+
+SENTIMENT_DB_PATH = "./cache/news/sentiment.db"
+SCHEMA_VERSION = 3
+
+_CACHE_FILE_PATTERN = re.compile(
+    r"^sentiment_(.+)_(\d{4}-\d{2}-\d{2})-(\d{4}-\d{2}-\d{2})_(\w+)\.txt$"
+)
+
+
+class SentimentDatabase:
+    """
+    News windows and their sentiment in a single SQLite file (WAL mode),
+    indexed on (symbol, to_date) for point lookups and date range reads.
+
+    Since schema version 2 each window also keeps the logits of every headline
+    and the class probabilities of the summed logits, so the window sentiment
+    can be re-aggregated under another rule without running the model.
+
+    Since schema version 3 windows are also keyed on the near-duplicate
+    threshold (0 when not collapsing) and keep the aggregation weight of every
+    headline, None when they all count once.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str = SENTIMENT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS windows (
+                    symbol TEXT NOT NULL,
+                    to_date TEXT NOT NULL,
+                    from_date TEXT NOT NULL,
+                    news_limit INTEGER,
+                    probability REAL NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    headlines TEXT NOT NULL,
+                    PRIMARY KEY (symbol, to_date, from_date, news_limit)
+                )
+                """)
+            self._migrate(connection)
+
+    @classmethod
+    def default(cls, path: str = SENTIMENT_DB_PATH) -> "SentimentDatabase":
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def get_window(
+        self,
+        symbol: str,
+        to_date: str,
+        from_date: str,
+        limit: int,
+        aggregation: str = "sum",
+        dedup_threshold: Optional[float] = None,
+    ) -> Optional[Tuple[List[str], float, str, int]]:
+        """The cached window, or None if missing or not re-aggregatable."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT probability, sentiment, headlines, logits, weights FROM windows "
+                "WHERE symbol = ? AND to_date = ? AND from_date = ? AND news_limit IS ? "
+                "AND dedup_threshold = ?",
+                (symbol, to_date, from_date, limit, dedup_threshold or 0),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return self._read_window(*row, aggregation)
+
+    def get_windows(
+        self,
+        symbol: str,
+        start: str,
+        end: str,
+        limit: int,
+        aggregation: str = "sum",
+        dedup_threshold: Optional[float] = None,
+    ) -> Dict[Tuple[str, str], Tuple[List[str], float, str, int]]:
+        """Every cached window of a symbol whose to_date is in [start, end]."""
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT to_date, from_date, probability, sentiment, headlines, logits, "
+                "weights FROM windows WHERE symbol = ? AND to_date BETWEEN ? AND ? "
+                "AND news_limit IS ? AND dedup_threshold = ?",
+                (symbol, start, end, limit, dedup_threshold or 0),
+            )
+            .fetchall()
+        )
+        windows = {}
+        for to_date, from_date, *row in rows:
+            window = self._read_window(*row, aggregation)
+            if window is not None:
+                windows[(to_date, from_date)] = window
+        return windows
+
+    def put_windows(
+        self,
+        rows: List[
+            Tuple[
+                str,
+                str,
+                str,
+                int,
+                float,
+                str,
+                List[str],
+                Optional[List[List[float]]],
+                Optional[float],
+                Optional[List[float]],
+            ]
+        ],
+    ):
+        """
+        Insert (symbol, to_date, from_date, limit, probability, sentiment,
+        headlines, logits, dedup_threshold, weights) rows; logits may be None
+        when unknown, dedup_threshold and weights None when not collapsing.
+        """
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO windows (symbol, to_date, from_date, "
+                "news_limit, dedup_threshold, probability, sentiment, headlines, "
+                "logits, probabilities, weights) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        s,
+                        t,
+                        f,
+                        l,
+                        threshold or 0,
+                        float(p),
+                        sentiment,
+                        json.dumps(headlines),
+                        None if logits is None else json.dumps(logits),
+                        (
+                            json.dumps(aggregate_probabilities(logits, "sum", weights))
+                            if logits
+                            else None
+                        ),
+                        None if weights is None else json.dumps(weights),
+                    )
+                    for s, t, f, l, p, sentiment, headlines, logits, threshold, weights in rows
+                ],
+            )
+
+    def put_window(
+        self,
+        symbol: str,
+        to_date: str,
+        from_date: str,
+        limit: int,
+        probability: float,
+        sentiment: str,
+        headlines: List[str],
+        logits: Optional[List[List[float]]] = None,
+        dedup_threshold: Optional[float] = None,
+        weights: Optional[List[float]] = None,
+    ):
+        self.put_windows(
+            [
+                (
+                    symbol,
+                    to_date,
+                    from_date,
+                    limit,
+                    probability,
+                    sentiment,
+                    headlines,
+                    logits,
+                    dedup_threshold,
+                    weights,
+                )
+            ]
+        )
+
+    def sample_headlines(self, limit: int) -> List[str]:
+        headlines = []
+        for (row,) in self._connection().execute("SELECT headlines FROM windows"):
+            headlines.extend(json.loads(row))
+            if len(headlines) >= limit:
+                break
+        return headlines
+
+    def _read_window(
+        self,
+        probability: float,
+        sentiment: str,
+        headlines: str,
+        logits: Optional[str],
+        weights: Optional[str],
+        aggregation: str,
+    ) -> Optional[Tuple[List[str], float, str, int]]:
+        headlines = json.loads(headlines)
+        if aggregation != "sum":
+            if logits is not None:
+                logits = json.loads(logits)
+            else:
+                # Rows from schema version 1: look the logits up by headline
+                keys = [headline_key(headline) for headline in headlines]
+                logits_by_key = HeadlineStore.default().get_many(keys)
+                if len(logits_by_key) < len(set(keys)):
+                    return None
+                logits = [logits_by_key[key] for key in keys]
+            if weights is not None:
+                weights = json.loads(weights)
+            probability, sentiment = aggregate_logits(logits, aggregation, weights)
+        return headlines, probability, sentiment, len(headlines)
+
+    def _migrate(self, connection: sqlite3.Connection):
+        if connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # Processes opening an old file at once are serialised by the write
+        # lock, and the version is read again under it so only one migrates
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._upgrade(connection)
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+    def _upgrade(self, connection: sqlite3.Connection):
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        if version < 2:
+            connection.execute("ALTER TABLE windows ADD COLUMN logits TEXT")
+            connection.execute("ALTER TABLE windows ADD COLUMN probabilities TEXT")
+        if version < 3:
+            # The primary key changes, so the table is rebuilt
+            connection.execute("""
+                CREATE TABLE windows_v3 (
+                    symbol TEXT NOT NULL,
+                    to_date TEXT NOT NULL,
+                    from_date TEXT NOT NULL,
+                    news_limit INTEGER,
+                    dedup_threshold REAL NOT NULL DEFAULT 0,
+                    probability REAL NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    headlines TEXT NOT NULL,
+                    logits TEXT,
+                    probabilities TEXT,
+                    weights TEXT,
+                    PRIMARY KEY (symbol, to_date, from_date, news_limit, dedup_threshold)
+                )
+                """)
+            connection.execute(
+                "INSERT INTO windows_v3 (symbol, to_date, from_date, news_limit, "
+                "probability, sentiment, headlines, logits, probabilities) "
+                "SELECT symbol, to_date, from_date, news_limit, probability, "
+                "sentiment, headlines, logits, probabilities FROM windows"
+            )
+            connection.execute("DROP TABLE windows")
+            connection.execute("ALTER TABLE windows_v3 RENAME TO windows")
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+
+def migrate_text_cache(
+    database: SentimentDatabase, cache_dir: str = "./cache/news", remove: bool = False
+) -> int:
+    """Imports the sentiment_<SYMBOL>_<from>-<to>_<limit>.txt cache files."""
+    rows, files = [], []
+    for cache_file in glob.glob(os.path.join(cache_dir, "*", "sentiment_*.txt")):
+        match = _CACHE_FILE_PATTERN.match(os.path.basename(cache_file))
+        if match is None:
+            continue
+        symbol, from_date, to_date, limit = match.groups()
+        with open(cache_file, "r") as f:
+            lines = f.readlines()
+        if len(lines) < 2:
+            continue
+        rows.append(
+            (
+                symbol,
+                to_date,
+                from_date,
+                None if limit == "None" else int(limit),
+                _parse_probability(lines[0].strip()),
+                lines[1].strip(),
+                [line.strip() for line in lines[2:]],
+                None,
+                None,
+                None,
+            )
+        )
+        files.append(cache_file)
+
+    database.put_windows(rows)
+    if remove:
+        for cache_file in files:
+            os.remove(cache_file)
+    return len(rows)
+
+
+def _parse_probability(value: str) -> float:
+    # Older caches stored the torch tensor repr, e.g. "tensor(0.9987, grad_fn=...)"
+    match = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", value)
+    return float(match.group(0)) if match else 0.0
@@ -0,0 +1,94 @@
+"""
+Compares the sentiment backends against the full-precision PyTorch baseline:
+per-headline label agreement, largest logit difference and throughput.
+
+    python src/sentiment_parity_check.py -b torch-int8 onnx
+"""
+
+from sentiment.backends import BACKENDS, DEFAULT_BACKEND
+from sentiment.sentiment_db import SentimentDatabase
+from typing import List
+import argparse
+import time
+
+SAMPLE_HEADLINES = [
+    "Stocks rally as inflation cools more than expected",
+    "Tech shares slump after disappointing earnings guidance",
+    "Fed holds rates steady, signals patience on cuts",
+    "Apple unveils new iPhone lineup at annual event",
+    "Oil prices tumble on weaker demand outlook",
+    "Bank profits surge on higher interest income",
+    "Retail sales unexpectedly fall in September",
+    "Treasury yields climb to multi-year highs",
+]
+
+
+def load_headlines(limit: int) -> List[str]:
+    """Headlines from the news cache, or a small built-in sample."""
+    headlines = SentimentDatabase.default().sample_headlines(limit)
+    headlines = list(dict.fromkeys(h for h in headlines if h))[:limit]
+    return headlines or SAMPLE_HEADLINES
+
+
+def score(backend, headlines: List[str], batch_size: int):
+    logits = []
+    start = time.perf_counter()
+    for i in range(0, len(headlines), batch_size):
+        logits.extend(backend.logits(headlines[i : i + batch_size]))
+    return logits, len(headlines) / (time.perf_counter() - start)
+
+
+def argmax(values: List[float]) -> int:
+    return values.index(max(values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment backend parity check")
+    parser.add_argument(
+        "-b",
+        "--backends",
+        nargs="+",
+        choices=[name for name in BACKENDS if name != DEFAULT_BACKEND],
+        default=[name for name in BACKENDS if name != DEFAULT_BACKEND],
+        help="Backends to compare against the baseline (default: all)",
+    )
+    parser.add_argument(
+        "-n",
+        "--num_headlines",
+        type=int,
+        default=512,
+        help="Maximum number of cached headlines to score (default: 512)",
+    )
+    parser.add_argument(
+        "-bs",
+        "--batch_size",
+        type=int,
+        default=32,
+        help="Headlines per model call (default: 32)",
+    )
+    args = parser.parse_args()
+
+    headlines = load_headlines(args.num_headlines)
+    print(f"Scoring {len(headlines)} headlines")
+
+    baseline = BACKENDS[DEFAULT_BACKEND]()
+    score(baseline, headlines[: args.batch_size], args.batch_size)  # warm-up
+    baseline_logits, baseline_throughput = score(baseline, headlines, args.batch_size)
+    print(f"{DEFAULT_BACKEND}: {baseline_throughput:.1f} headlines/s")
+
+    for name in args.backends:
+        backend = BACKENDS[name]()
+        score(backend, headlines[: args.batch_size], args.batch_size)
+        logits, throughput = score(backend, headlines, args.batch_size)
+
+        agreement = sum(
+            argmax(a) == argmax(b) for a, b in zip(baseline_logits, logits)
+        ) / len(headlines)
+        max_diff = max(
+            abs(x - y) for a, b in zip(baseline_logits, logits) for x, y in zip(a, b)
+        )
+        print(
+            f"{name}: {throughput:.1f} headlines/s "
+            f"({throughput / baseline_throughput:.2f}x), "
+            f"label agreement {agreement:.2%}, max logit diff {max_diff:.4f}"
+        )
@@ -1,7 +1,8 @@
 from lumibot.strategies import Strategy
+from strategies.iteration_cache import IterationCacheMixin
 
 
-class BuyHold(Strategy):
+class BuyHold(IterationCacheMixin, Strategy):
 
     def initialize(self):
         self.sleeptime = "1D"
@@ -1,8 +1,49 @@
+from bisect import bisect_left, bisect_right
 from lumibot.strategies import Strategy
+from numpy.lib.stride_tricks import sliding_window_view
+from strategies.iteration_cache import IterationCacheMixin
+from typing import Optional
+import numpy as np
 import pandas as pd
 
 
-class SupplyDemandStrategy(Strategy):
+class ZoneIndex:
+    """Zone prices kept sorted without duplicates, with the time of their latest candle."""
+
+    def __init__(self):
+        self.prices = []
+        self.times = []
+
+    def add(self, prices, times):
+        for price, time in zip(prices, times):
+            i = bisect_left(self.prices, price)
+            if i < len(self.prices) and self.prices[i] == price:
+                self.times[i] = max(self.times[i], time)
+            else:
+                self.prices.insert(i, price)
+                self.times.insert(i, time)
+
+    def evict_before(self, cutoff):
+        kept = [i for i, time in enumerate(self.times) if time >= cutoff]
+        if len(kept) < len(self.times):
+            self.prices = [self.prices[i] for i in kept]
+            self.times = [self.times[i] for i in kept]
+
+    def find(self, price: float, margin: float = 0.01) -> Optional[float]:
+        """A zone within margin of the price, relative to the zone, or None."""
+        # |zone - price| / zone < margin  <=>  price / (1 + margin) < zone < price / (1 - margin)
+        i = bisect_right(self.prices, price / (1 + margin))
+        while i < len(self.prices) and self.prices[i] <= price / (1 - margin):
+            if abs(self.prices[i] - price) / self.prices[i] < margin:
+                return self.prices[i]
+            i += 1
+        return None
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class SupplyDemandStrategy(IterationCacheMixin, Strategy):
     parameters = {
         "symbol": "BTC/USD",
         "demand_threshold": 5,  # Nombre de bougies de rebond pour créer une zone de demande
@@ -10,19 +51,25 @@ class SupplyDemandStrategy(Strategy):
         "stop_loss_percentage": 0.02,  # Stop loss à 2% en dessous du niveau de demande / au-dessus du niveau d’offre
         "take_profit_percentage": 0.05,  # Take profit à 5% au-dessus du niveau de demande / en dessous du niveau d’offre
         "order_size_percentage": 0.05,  # Taille de chaque ordre en pourcentage du portefeuille
+        "zone_max_age": "30D",  # Les zones plus anciennes sont oubliées
     }
 
     def initialize(self, symbol=None):
         self.symbol = symbol if symbol else self.parameters["symbol"]
-        self.demand_zones = []
-        self.supply_zones = []
+        self.demand_zones = ZoneIndex()
+        self.supply_zones = ZoneIndex()
+        self.zone_max_age = pd.Timedelta(self.parameters["zone_max_age"])
+        # Latest candle whose zones were detected, per zone type
+        self.processed_until = {"demand": None, "supply": None}
         print(f"Initialized Supply and Demand Strategy for {self.symbol}")
 
     def on_trading_iteration(self):
         # Charger les données de prix
-        historical_data = self.get_historical_data(
-            self.symbol, "1h", 100
+        historical_data = self.get_historical_prices(
+            self.symbol, 100, "hour"
         )  # 100 dernières bougies en 1 heure
+        if historical_data is not None:
+            historical_data = historical_data.df
         if historical_data is None or len(historical_data) < 10:
             print("Pas assez de données pour analyser les zones de supply et demand.")
             return
@@ -30,6 +77,9 @@ class SupplyDemandStrategy(Strategy):
         # Détecter les zones de demande et d'offre
         self.detect_demand_zones(historical_data)
         self.detect_supply_zones(historical_data)
+        cutoff = historical_data.index[-1] - self.zone_max_age
+        self.demand_zones.evict_before(cutoff)
+        self.supply_zones.evict_before(cutoff)
 
         # Vérifier si le prix actuel est dans une zone de demande
         current_price = self.get_last_price(self.symbol)
@@ -43,44 +93,46 @@ class SupplyDemandStrategy(Strategy):
             self.place_order("sell", supply_zone, current_price)
 
     def detect_demand_zones(self, data):
-        # Détecte les zones où le prix rebondit, créant une zone de demande
-        for i in range(
-            self.parameters["demand_threshold"],
-            len(data) - self.parameters["demand_threshold"],
-        ):
-            low = data["low"][i]
-            # Vérifier si le prix rebondit après avoir atteint ce niveau
-            if all(
-                data["low"][i] < data["low"][i - j]
-                for j in range(1, self.parameters["demand_threshold"])
-            ):
-                self.demand_zones.append(low)
+        # Détecte les zones où le prix rebondit, créant une zone de demande:
+        # un plus bas inférieur aux threshold - 1 plus bas précédents
+        threshold = self.parameters["demand_threshold"]
+        candles = self._new_candles(data, threshold, "demand")
+        lows = data["low"].to_numpy()
+        if threshold > 1 and len(candles):
+            previous = sliding_window_view(lows, threshold - 1)[candles - threshold + 1]
+            candles = candles[lows[candles] < previous.min(axis=1)]
+        self.demand_zones.add(lows[candles], data.index[candles])
 
     def detect_supply_zones(self, data):
-        # Détecte les zones où le prix baisse après avoir atteint un certain niveau, créant une zone d'offre
-        for i in range(
-            self.parameters["supply_threshold"],
-            len(data) - self.parameters["supply_threshold"],
-        ):
-            high = data["high"][i]
-            # Vérifier si le prix baisse après avoir atteint ce niveau
-            if all(
-                data["high"][i] > data["high"][i + j]
-                for j in range(1, self.parameters["supply_threshold"])
-            ):
-                self.supply_zones.append(high)
+        # Détecte les zones où le prix baisse après avoir atteint un certain niveau,
+        # créant une zone d'offre: un plus haut supérieur aux threshold - 1 suivants
+        threshold = self.parameters["supply_threshold"]
+        candles = self._new_candles(data, threshold, "supply")
+        highs = data["high"].to_numpy()
+        if threshold > 1 and len(candles):
+            following = sliding_window_view(highs, threshold - 1)[candles + 1]
+            candles = candles[highs[candles] > following.max(axis=1)]
+        self.supply_zones.add(highs[candles], data.index[candles])
+
+    def _new_candles(self, data, threshold: int, zone_type: str) -> np.ndarray:
+        """Positions of the candles that can be judged and were not judged yet."""
+        start, stop = threshold, len(data) - threshold
+        if self.processed_until[zone_type] is not None:
+            start = max(
+                start,
+                data.index.searchsorted(self.processed_until[zone_type], side="right"),
+            )
+        if stop > start:
+            self.processed_until[zone_type] = data.index[stop - 1]
+        return np.arange(start, max(start, stop))
 
     def is_in_demand_zone(self, price):
-        # Vérifie si le prix actuel est dans une zone de demande
-        return any(
-            abs(zone - price) / zone < 0.01 for zone in self.demand_zones
-        )  # marge de 1%
+        # Vérifie si le prix actuel est dans une zone de demande (marge de 1%)
+        return self.demand_zones.find(price)
 
     def is_in_supply_zone(self, price):
-        # Vérifie si le prix actuel est dans une zone d'offre
-        return any(
-            abs(zone - price) / zone < 0.01 for zone in self.supply_zones
-        )  # marge de 1%
+        # Vérifie si le prix actuel est dans une zone d'offre (marge de 1%)
+        return self.supply_zones.find(price)
 
     def place_order(self, side, zone, price):
         # Calcul du stop loss et du take profit
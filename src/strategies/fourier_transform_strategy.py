@@ -1,10 +1,14 @@
 from lumibot.strategies.strategy import Strategy
+from strategies.iteration_cache import IterationCacheMixin
+from utils.indicators import BarStream
+from utils.sliding_dft import SlidingDFT
+from typing import Optional
 import numpy as np
 import pandas as pd
 import scipy.fftpack as fft
 
 
-class FourierTransformStrategy(Strategy):
+class FourierTransformStrategy(IterationCacheMixin, Strategy):
     # Configuration de la stratégie
     parameters = {
         "symbols": ["SPY", "AAPL", "DIA"],
@@ -13,13 +17,32 @@ class FourierTransformStrategy(Strategy):
         "stop_loss_pct": 0.02,  # Stop-loss à 2%
         "take_profit_pct": 0.04,  # Prise de profit à 4%
         "long_short": "both",  # Options: "long", "short", "both"
+        # Met à jour les 5 basses fréquences de chaque symbole à chaque barre
+        # au lieu de recalculer la FFT complète
+        "sliding_dft": True,
     }
 
     def initialize(self):
         self.active_orders = {}
         self.sleeptime = "1m"
 
+        symbols = self.parameters["symbols"]
+        self.sliding_dft = SlidingDFT(len(symbols), self.parameters["window_size"])
+        self.minute_bars = {
+            symbol: BarStream(
+                lambda length, symbol=symbol: self._get_minute_bars(symbol, length),
+                self.parameters["window_size"],
+            )
+            for symbol in symbols
+        }
+
     def on_trading_iteration(self):
+        if self.parameters["sliding_dft"]:
+            signals = self._sliding_signals()
+            for symbol, signal_value in zip(self.parameters["symbols"], signals):
+                self._act_on_signal(symbol, signal_value)
+            return
+
         # for symbol in self.parameters["symbols"]:
         symbol = "SPY"
         # Obtenir les données historiques
@@ -33,8 +56,10 @@ class FourierTransformStrategy(Strategy):
 
         signal = self.apply_fourier_transform(closes)
 
+        self._act_on_signal(symbol, signal.iloc[-1])
+
+    def _act_on_signal(self, symbol, signal_value):
         # Générer des signaux d'achat/vente
-        signal_value = signal.iloc[-1]
         if signal_value > 0:
             # Signal d'achat
             if self.parameters["long_short"] in ["long", "both"]:
@@ -44,6 +69,39 @@ class FourierTransformStrategy(Strategy):
             if self.parameters["long_short"] in ["short", "both"]:
                 self.open_position(symbol, "short")
 
+    def _sliding_signals(self) -> np.ndarray:
+        """Filtered signal at the latest minute of every symbol, updated with the new bars."""
+        symbols = self.parameters["symbols"]
+        revised = np.full(len(symbols), np.nan)
+        new_closes = [[] for _ in symbols]
+        for i, symbol in enumerate(symbols):
+            reset, bars = self.minute_bars[symbol].poll()
+            if reset:
+                self.sliding_dft.reset(i, [bar.close for bar, _ in bars])
+                continue
+            for bar, revise in bars:
+                if revise:
+                    revised[i] = bar.close
+                else:
+                    new_closes[i].append(bar.close)
+
+        if not np.isnan(revised).all():
+            self.sliding_dft.revise(revised, ~np.isnan(revised))
+        # Symbols usually get one bar each, applied in a single vectorised push
+        for step in range(max(map(len, new_closes), default=0)):
+            values = np.array(
+                [
+                    closes[step] if step < len(closes) else np.nan
+                    for closes in new_closes
+                ]
+            )
+            self.sliding_dft.push(values, ~np.isnan(values))
+        return self.sliding_dft.last_values()
+
+    def _get_minute_bars(self, symbol: str, length: int) -> Optional[pd.DataFrame]:
+        bars = self.get_historical_prices(symbol, length, "minute")
+        return bars.df if bars is not None else None
+
     def apply_fourier_transform(self, price_series):
         print(price_series)
         # Calculer la transformée de Fourier
@@ -140,3 +198,4 @@ class FourierTransformStrategy(Strategy):
                 side="sell" if order.side.lower() == "buy" else "buy",
                 order_type="market",
             )
+        super().on_strategy_end()
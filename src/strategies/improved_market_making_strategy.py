@@ -1,8 +1,11 @@
 from lumibot.strategies import Strategy
+from strategies.iteration_cache import IterationCacheMixin
+from utils.indicators import ATR, BarStream, Crossover, SMA
+from typing import Optional
 import pandas as pd
 
 
-class ImprovedMarketMakingStrategy(Strategy):
+class ImprovedMarketMakingStrategy(IterationCacheMixin, Strategy):
     parameters = {
         "symbol": "AAPL",
         "base_spread_percentage": 0.001,  # Spread de base réduit
@@ -25,6 +28,11 @@ class ImprovedMarketMakingStrategy(Strategy):
         self.min_order_size_percentage = self.parameters["min_order_size_percentage"]
         self.atr_multiplier = self.parameters["atr_multiplier"]
         self.stop_loss_percentage = self.parameters["stop_loss_percentage"]
+        # 50 days for the trend's long moving average
+        self.daily_bars = BarStream(
+            self._get_daily_bars, max(self.volatility_period + 1, 50)
+        )
+        self._reset_indicators()
 
     def on_trading_iteration(self):
 
@@ -69,14 +77,8 @@ class ImprovedMarketMakingStrategy(Strategy):
         self,
     ):
         # Calcul de l'ATR pour ajuster le spread dynamiquement
-        historical_data = self.get_historical_prices(
-            self.symbol,
-            length=self.volatility_period
-            + 1,  # +1 pour compenser le décalage du calcul
-            timestep="day",
-        ).df
-
-        atr = self.calculate_atr(historical_data, self.volatility_period)
+        self._update_indicators()
+        atr = self.atr.value
         last_price = self.get_last_price(self.symbol)
         cash = self.get_cash()
 
@@ -104,23 +106,28 @@ class ImprovedMarketMakingStrategy(Strategy):
 
         return quantity, buy_price, sell_price
 
-    def calculate_atr(self, data, period):
-        # Préparation des données pour le calcul de l'ATR
-        data = data.copy()
-        data["prior_close"] = data["close"].shift(1)
-        data["high_low"] = data["high"] - data["low"]
-        data["high_close"] = abs(data["high"] - data["prior_close"])
-        data["low_close"] = abs(data["low"] - data["prior_close"])
-        tr = data[["high_low", "high_close", "low_close"]].max(axis=1)
-
-        return tr.rolling(window=period).mean().iloc[-1]
-
     def is_market_trending(self):
-        historical_data = self.get_historical_prices(
-            self.symbol,
-            length=50,  # Période pour la moyenne mobile
-            timestep="day",
-        ).df
-        sma_short = historical_data["close"].rolling(window=20).mean().iloc[-1]
-        sma_long = historical_data["close"].rolling(window=50).mean().iloc[-1]
-        return sma_short > sma_long  # Tendance haussière
+        self._update_indicators()
+        return bool(self.trend.above)  # Tendance haussière
+
+    def _reset_indicators(self):
+        self.atr = ATR(self.volatility_period)
+        self.sma_short = SMA(20, min_periods=20)
+        self.sma_long = SMA(50, min_periods=50)
+        self.trend = Crossover()
+
+    def _update_indicators(self):
+        reset, bars = self.daily_bars.poll()
+        if reset:
+            self._reset_indicators()
+        for bar, revise in bars:
+            self.atr.update(bar.high, bar.low, bar.close, revise)
+            self.trend.update(
+                self.sma_short.update(bar.close, revise),
+                self.sma_long.update(bar.close, revise),
+                revise,
+            )
+
+    def _get_daily_bars(self, length: int) -> Optional[pd.DataFrame]:
+        bars = self.get_historical_prices(self.symbol, length=length, timestep="day")
+        return bars.df if bars is not None else None
@@ -0,0 +1,92 @@
+from typing import Dict, Tuple
+import copy
+import functools
+
+
+class IterationCacheMixin:
+    """
+    Serves the get_historical_prices and get_last_price calls of a trading
+    iteration from one snapshot per iteration.
+
+    Historical prices are fetched once per (asset, timestep) and iteration,
+    again only when a longer length is requested, and shorter requests get
+    the latest bars of that fetch. Nothing carries over between iterations,
+    so the short polls of a BarStream stay short after its warm-up. Last prices are memoised until the iteration ends. Calls made
+    outside on_trading_iteration, e.g. from order callbacks, are not cached.
+
+    Use it before Strategy in the bases: class S(IterationCacheMixin, Strategy).
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        iteration = cls.__dict__.get("on_trading_iteration")
+        if iteration is None:
+            return
+
+        @functools.wraps(iteration)
+        def on_trading_iteration(self):
+            self._iteration_cache = ({}, {})
+            try:
+                return iteration(self)
+            finally:
+                self._iteration_cache = None
+
+        cls.on_trading_iteration = on_trading_iteration
+
+    # Data source calls answered from a snapshot instead
+    data_calls_saved = 0
+    _iteration_cache: Tuple[Dict, Dict] = None
+
+    def get_historical_prices(self, asset, length, timestep="", *args, **kwargs):
+        fetch = super().get_historical_prices
+        if self._iteration_cache is None:
+            return fetch(asset, length, timestep, *args, **kwargs)
+
+        key = _cache_key(asset, (timestep, args), kwargs)
+        if key is None:
+            return fetch(asset, length, timestep, *args, **kwargs)
+
+        history, _ = self._iteration_cache
+        cached = history.get(key)
+        if cached is not None and cached[0] >= length:
+            self.data_calls_saved += 1
+            return _latest_bars(cached[1], cached[0], length)
+
+        bars = fetch(asset, length, timestep, *args, **kwargs)
+        history[key] = (length, bars)
+        return bars
+
+    def get_last_price(self, asset, *args, **kwargs):
+        if self._iteration_cache is None:
+            return super().get_last_price(asset, *args, **kwargs)
+
+        key = _cache_key(asset, args, kwargs)
+        if key is None:
+            return super().get_last_price(asset, *args, **kwargs)
+
+        _, prices = self._iteration_cache
+        if key in prices:
+            self.data_calls_saved += 1
+        else:
+            prices[key] = super().get_last_price(asset, *args, **kwargs)
+        return prices[key]
+
+    def on_strategy_end(self):
+        print(f"Iteration snapshots saved {self.data_calls_saved} data source calls")
+
+
+def _cache_key(asset, args, kwargs: dict):
+    key = (asset, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _latest_bars(bars, fetched_length: int, length: int):
+    if bars is None or fetched_length == length:
+        return bars
+    latest = copy.copy(bars)
+    latest.df = bars.df.iloc[-length:]
+    return latest
@@ -1,7 +1,8 @@
 from lumibot.strategies import Strategy
+from strategies.iteration_cache import IterationCacheMixin
 
 
-class MarketMakingStrategy(Strategy):
+class MarketMakingStrategy(IterationCacheMixin, Strategy):
     parameters = {
         "symbol": "BTC/USD",
         "spread_percentage": 0.002,
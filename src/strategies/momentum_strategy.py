@@ -1,9 +1,11 @@
 from lumibot.strategies.strategy import Strategy
-import numpy as np
-from typing import Tuple
+from strategies.iteration_cache import IterationCacheMixin
+from utils.indicators import BarStream, LogReturns, RollingStd, SMA
+from typing import Optional, Tuple
+import pandas as pd
 
 
-class MomentumStrategy(Strategy):
+class MomentumStrategy(IterationCacheMixin, Strategy):
     """
     A simple momentum-based trend-following strategy.
     The strategy buys when the price is above the moving average (indicating upward trend)
@@ -28,6 +30,10 @@ class MomentumStrategy(Strategy):
         self.take_profit_multiplier = take_profit_multiplier
         self.volatility_factor = volatility_factor
         self.last_trade = None
+        self.daily_bars = BarStream(
+            self._get_daily_bars, max(moving_average_period, volatility_period)
+        )
+        self._reset_indicators()
 
         print(f"Symbol: {self.symbol}")
         print(f"Moving Average Period: {self.moving_average_period}")
@@ -37,6 +43,7 @@ class MomentumStrategy(Strategy):
         print(f"Take Profit Multiplier: {self.take_profit_multiplier}")
 
     def on_trading_iteration(self):
+        self._update_indicators()
         cash, last_price, quantity, volatility = self._position_sizing()
         moving_average = self._get_moving_average()
 
@@ -60,19 +67,33 @@ class MomentumStrategy(Strategy):
         return cash, last_price, quantity, volatility
 
     def _get_volatility(self) -> float:
-        """Calculate volatility of the asset over a specific period."""
-        bars = self.get_historical_prices(self.symbol, self.volatility_period, "day")
-        closing_prices = bars.df["close"]
-        returns = np.diff(np.log(closing_prices))
-        return np.std(returns)
+        """Volatility of the asset over the volatility period."""
+        return self.volatility.value
 
     def _get_moving_average(self) -> float:
-        """Calculate the moving average of the price over the defined period."""
-        bars = self.get_historical_prices(
-            self.symbol, self.moving_average_period, "day"
-        )
-        closing_prices = bars.df["close"]
-        return np.mean(closing_prices)
+        """Moving average of the price over the defined period."""
+        return self.moving_average.value
+
+    def _reset_indicators(self):
+        self.moving_average = SMA(self.moving_average_period)
+        self.log_returns = LogReturns()
+        # The closes of the volatility period give one return fewer
+        self.volatility = RollingStd(max(1, self.volatility_period - 1))
+
+    def _update_indicators(self):
+        """Feed the daily bars that are new since the last iteration to the indicators."""
+        reset, bars = self.daily_bars.poll()
+        if reset:
+            self._reset_indicators()
+        for bar, revise in bars:
+            self.moving_average.update(bar.close, revise)
+            log_return = self.log_returns.update(bar.close, revise)
+            if log_return is not None:
+                self.volatility.update(log_return, revise)
+
+    def _get_daily_bars(self, length: int) -> Optional[pd.DataFrame]:
+        bars = self.get_historical_prices(self.symbol, length, "day")
+        return bars.df if bars is not None else None
 
     def _should_buy(self, last_price: float, moving_average: float) -> bool:
         """Buy if the price is above the moving average (upward trend)."""
@@ -0,0 +1,323 @@
+"""
+Vectorised pre-screen of the signals of the built-in strategies.
+
+The indicators of a whole bar array are computed at once; a light event loop
+then applies the strategy's own state (cash gate, last trade), the broker
+fee model and bracket exits. Assumptions, which the consistency report
+measures against lumibot:
+
+- decisions are taken on the close of a bar and filled at the next open;
+- a bracket leg fills at its level, or at the open when the bar gaps
+  through it; when both legs are touched in one bar the stop wins;
+- fees are flat_fee + percent_fee * order value, as lumibot applies them.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import inspect
+import math
+import numpy as np
+import pandas as pd
+
+# Bar interval each strategy decides on
+PRESCREEN_INTERVALS = {"momentum": "1d", "price_action": "1d"}
+# History loaded before the first traded bar, covering the longest lookbacks
+PRESCREEN_WARMUP = {"1d": pd.Timedelta(days=120)}
+# Strategies the prescreen cannot model, with the reason
+UNSCREENABLE = {
+    "fourier_transform": "it creates its orders without submitting them, "
+    "so lumibot never fills them",
+}
+
+
+class Lot:
+    """One filled entry order; side is 1 for long and -1 for short."""
+
+    def __init__(self, side: int, quantity: float, entry: int, price: float):
+        self.side = side
+        self.quantity = quantity
+        self.entry = entry
+        self.price = price
+        self.exit = None
+        self.exit_price = None
+
+
+class PrescreenResult:
+    """Equity curve of the traded bars, every lot, and summary stats."""
+
+    def __init__(self, equity: pd.Series, lots: List[Lot], fees: float):
+        self.equity = equity
+        self.lots = lots
+        self.fees = fees
+        self.stats = summary_stats(equity)
+        self.stats["trades"] = len(lots)
+        self.stats["fees"] = fees
+
+
+class _Simulation:
+    """Cash, open lots and scheduled bracket exits over arrays of bars."""
+
+    def __init__(
+        self, bars: pd.DataFrame, trading_fees: dict, budget: float, first: int = 0
+    ):
+        # First bar traded on, earlier ones only warm the indicators up
+        self.first = first
+        self.open = bars["open"].to_numpy(dtype=float)
+        self.high = bars["high"].to_numpy(dtype=float)
+        self.low = bars["low"].to_numpy(dtype=float)
+        self.close = bars["close"].to_numpy(dtype=float)
+        self.buy_fees = trading_fees.get("buy_trading_fees", [])
+        self.sell_fees = trading_fees.get("sell_trading_fees", [])
+        self.cash = budget
+        self.position = 0.0
+        self.fees = 0.0
+        self.lots: List[Lot] = []
+        self.open_lots: List[Lot] = []
+        self.exits: Dict[int, List[Tuple[Lot, float]]] = {}
+        # Orders of the current bar, None closing every lot
+        self.orders: List[Optional[tuple]] = []
+
+    def submit(self, side: int, quantity: float, take_profit=None, stop_loss=None):
+        """Market order filled at the next open, with optional bracket levels."""
+        if quantity > 0:
+            self.orders.append((side, quantity, take_profit, stop_loss))
+
+    def submit_close_all(self):
+        """Close every open lot at the next open."""
+        self.orders.append(None)
+
+    def start_bar(self, t: int):
+        """Fill the orders submitted on the previous bar, then the bracket exits of bar t."""
+        orders, self.orders = self.orders, []
+        for order in orders:
+            if order is None:
+                for lot in list(self.open_lots):
+                    self._close(lot, t, self.open[t])
+            else:
+                self._open(t, *order)
+        for lot, price in self.exits.pop(t, []):
+            if lot.exit is None:
+                self._close(lot, t, price)
+
+    def equity(self, t: int) -> float:
+        return self.cash + self.position * self.close[t]
+
+    def _open(self, t: int, side: int, quantity: float, take_profit, stop_loss):
+        price = self.open[t]
+        self._trade(side, quantity, price)
+        lot = Lot(side, quantity, t, price)
+        self.lots.append(lot)
+        self.open_lots.append(lot)
+        self._schedule_exit(lot, take_profit, stop_loss)
+
+    def _schedule_exit(self, lot: Lot, take_profit, stop_loss):
+        t, side = lot.entry, lot.side
+        high, low, open_ = self.high[t:], self.low[t:], self.open[t:]
+        candidates = []
+        if stop_loss is not None and not math.isnan(stop_loss):
+            hit = low <= stop_loss if side > 0 else high >= stop_loss
+            gapped = open_ <= stop_loss if side > 0 else open_ >= stop_loss
+            candidates.append((hit, gapped, stop_loss, 0))
+        if take_profit is not None and not math.isnan(take_profit):
+            hit = high >= take_profit if side > 0 else low <= take_profit
+            gapped = open_ >= take_profit if side > 0 else open_ <= take_profit
+            candidates.append((hit, gapped, take_profit, 1))
+
+        best = None
+        for hit, gapped, level, priority in candidates:
+            if not hit.any():
+                continue
+            i = int(hit.argmax())
+            price = open_[i] if gapped[i] else level
+            if best is None or (i, priority) < best[:2]:
+                best = (i, priority, price)
+        if best is not None:
+            self.exits.setdefault(t + best[0], []).append((lot, best[2]))
+
+    def _close(self, lot: Lot, t: int, price: float):
+        self._trade(-lot.side, lot.quantity, price)
+        lot.exit, lot.exit_price = t, price
+        self.open_lots.remove(lot)
+
+    def _trade(self, side: int, quantity: float, price: float):
+        value = quantity * price
+        fee = order_fee(value, self.buy_fees if side > 0 else self.sell_fees)
+        self.cash -= side * value + fee
+        self.position += side * quantity
+        self.fees += fee
+
+
+def order_fee(value: float, trading_fees: list) -> float:
+    return sum(
+        float(fee.flat_fee) + float(fee.percent_fee) * value for fee in trading_fees
+    )
+
+
+def strategy_parameters(strategy_class, parameters: dict) -> dict:
+    """The strategy's defaults overridden by the given parameters, as lumibot passes them."""
+    defaults = dict(getattr(strategy_class, "parameters", None) or {})
+    for name, parameter in inspect.signature(
+        strategy_class.initialize
+    ).parameters.items():
+        if parameter.default is not inspect.Parameter.empty:
+            defaults[name] = parameter.default
+    defaults.update({k: v for k, v in parameters.items() if k in defaults})
+    return defaults
+
+
+def prescreen(
+    strategy_name: str,
+    bars: pd.DataFrame,
+    parameters: dict,
+    trading_fees: Optional[dict] = None,
+    budget: float = 100000,
+    trade_from=None,
+) -> PrescreenResult:
+    """
+    Simulate a strategy's signals over OHLC bars (lowercase columns). Bars
+    before trade_from only warm the indicators up, as the history lumibot
+    fetches before the start of a backtest.
+    """
+    if strategy_name not in SIGNALS:
+        raise ValueError(f"Unknown prescreen strategy: {strategy_name}")
+    first = 0
+    if trade_from is not None:
+        first = int(bars.index.searchsorted(_utc(trade_from)))
+    if first >= len(bars):
+        raise ValueError("No bars to trade on")
+
+    simulation = _Simulation(bars, trading_fees or {}, budget, first)
+    equity = SIGNALS[strategy_name](simulation, parameters)
+    return PrescreenResult(
+        pd.Series(equity[first:], index=bars.index[first:], name="equity"),
+        simulation.lots,
+        simulation.fees,
+    )
+
+
+def _momentum(simulation: _Simulation, parameters: dict) -> np.ndarray:
+    p = parameters
+    close = pd.Series(simulation.close)
+    moving_average = close.rolling(p["moving_average_period"], min_periods=1).mean()
+    # Standard deviation of the returns within the last volatility_period closes
+    volatility = (
+        np.log(close)
+        .diff()
+        .rolling(max(1, p["volatility_period"] - 1), min_periods=1)
+        .std(ddof=0)
+    )
+    factor = volatility * p["volatility_factor"]
+    quantity_fraction = (p["cash_at_risk"] / (1 + volatility)).to_numpy()
+    signal = np.sign(close - moving_average).to_numpy()
+    buy_take_profit = (close * (p["take_profit_multiplier"] + factor)).to_numpy()
+    buy_stop_loss = (close * (p["stop_loss_multiplier"] - factor)).to_numpy()
+    sell_take_profit = (close * (p["take_profit_multiplier"] - factor)).to_numpy()
+    sell_stop_loss = (close * (p["stop_loss_multiplier"] + factor)).to_numpy()
+    volatility = volatility.to_numpy()
+    prices = simulation.close
+
+    equity = np.full(len(prices), np.nan)
+    last_trade = None
+    for t in range(simulation.first, len(prices)):
+        simulation.start_bar(t)
+        cash = simulation.cash
+        if cash > prices[t] and signal[t] != 0 and not math.isnan(volatility[t]):
+            quantity = round(cash * quantity_fraction[t] / prices[t], 0)
+            if signal[t] > 0:
+                if last_trade == "sell":
+                    simulation.submit_close_all()
+                simulation.submit(1, quantity, buy_take_profit[t], buy_stop_loss[t])
+                last_trade = "buy"
+            else:
+                if last_trade == "buy":
+                    simulation.submit_close_all()
+                simulation.submit(-1, quantity, sell_take_profit[t], sell_stop_loss[t])
+                last_trade = "sell"
+        equity[t] = simulation.equity(t)
+    return equity
+
+
+def _price_action(simulation: _Simulation, parameters: dict) -> np.ndarray:
+    p = parameters
+    close = pd.Series(simulation.close)
+    short_ma = close.rolling(p["ma_short_period"], min_periods=1).mean().to_numpy()
+    long_ma = close.rolling(p["ma_long_period"], min_periods=1).mean().to_numpy()
+    prices = simulation.close
+
+    equity = np.full(len(prices), np.nan)
+    last_trade = None
+    for t in range(simulation.first, len(prices)):
+        simulation.start_bar(t)
+        cash = simulation.cash
+        if cash > prices[t]:
+            quantity = round(cash * p["cash_at_risk"] / prices[t], 0)
+            if short_ma[t] > long_ma[t] and last_trade != "buy":
+                stop_loss = prices[t] * (1 - p["volatility_factor"])
+                simulation.submit(1, quantity, stop_loss=stop_loss)
+                last_trade = "buy"
+            elif short_ma[t] < long_ma[t] and last_trade != "sell":
+                stop_loss = prices[t] * (1 + p["volatility_factor"])
+                simulation.submit(-1, quantity, stop_loss=stop_loss)
+                last_trade = "sell"
+        equity[t] = simulation.equity(t)
+    return equity
+
+
+SIGNALS = {
+    "momentum": _momentum,
+    "price_action": _price_action,
+}
+
+
+def summary_stats(equity: pd.Series) -> dict:
+    """Stats named like lumibot's backtest results."""
+    returns = equity.pct_change().dropna()
+    years = max((equity.index[-1] - equity.index[0]).days / 365.25, 1 / 365.25)
+    periods_per_year = len(returns) / years if len(returns) else 0
+    total_return = equity.iloc[-1] / equity.iloc[0] - 1
+    volatility = returns.std() * math.sqrt(periods_per_year) if len(returns) > 1 else 0
+    drawdown = (equity / equity.cummax() - 1).min()
+    return {
+        "total_return": total_return,
+        "cagr": (1 + total_return) ** (1 / years) - 1,
+        "volatility": volatility,
+        "sharpe": (
+            returns.mean() * periods_per_year / volatility if volatility else math.nan
+        ),
+        "max_drawdown": -drawdown,
+    }
+
+
+def consistency_report(prescreen_stats: dict, event_stats: dict) -> pd.DataFrame:
+    """Side by side stats of a pre-screen and of lumibot's event-driven backtest."""
+    rows = {}
+    for name in ("total_return", "cagr", "volatility", "sharpe", "max_drawdown"):
+        event = event_stats.get(name, math.nan) if event_stats else math.nan
+        if isinstance(event, dict):
+            # lumibot reports the drawdown with its date
+            event = event.get("drawdown", math.nan)
+        prescreen_value = prescreen_stats.get(name, math.nan)
+        rows[name] = {
+            "prescreen": prescreen_value,
+            "event_driven": event,
+            "difference": prescreen_value - event,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def sample_ranges(start, end, count: int, days: int) -> List[tuple]:
+    """count UTC ranges of days days spread evenly over [start, end]."""
+    start, end = _utc(start), _utc(end)
+    length = pd.Timedelta(days=days)
+    if count <= 0:
+        return []
+    if end - start < length:
+        return [(start, end)]
+    step = (end - start - length) / max(count - 1, 1)
+    return [(start + i * step, start + i * step + length) for i in range(count)]
+
+
+def _utc(timestamp) -> pd.Timestamp:
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
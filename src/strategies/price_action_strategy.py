@@ -1,9 +1,11 @@
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 from lumibot.strategies.strategy import Strategy
-import numpy as np
+from strategies.iteration_cache import IterationCacheMixin
+from utils.indicators import BarStream, SMA
+import pandas as pd
 
 
-class PriceActionStrategy(Strategy):
+class PriceActionStrategy(IterationCacheMixin, Strategy):
     """
     A trading strategy that makes decisions based on price action and market volatility.
     """
@@ -15,8 +17,6 @@ class PriceActionStrategy(Strategy):
         sleeptime: str = "24H",
         ma_short_period: int = 20,
         ma_long_period: int = 50,
-        volatility_threshold: float = 0.03,
-        volatility_period: int = 14,
         volatility_factor: float = 0.1,
     ):
         self.symbol = symbol
@@ -24,17 +24,15 @@ class PriceActionStrategy(Strategy):
         self.cash_at_risk = cash_at_risk
         self.ma_short_period = ma_short_period
         self.ma_long_period = ma_long_period
-        self.volatility_threshold = volatility_threshold
-        self.volatility_period = volatility_period
         self.volatility_factor = volatility_factor
         self.last_trade = None
+        self.daily_bars: Dict[str, BarStream] = {}
+        self.moving_averages: Dict[str, Tuple[SMA, SMA]] = {}
 
         print(f"Sleep time: {self.sleeptime}")
         print(f"Cash at risk: {self.cash_at_risk}")
         print(f"Short MA period: {self.ma_short_period}")
         print(f"Long MA period: {self.ma_long_period}")
-        print(f"Volatility threshold: {self.volatility_threshold}")
-        print(f"Volatility period: {self.volatility_period}")
 
     def on_trading_iteration(self):
         cash, last_price, quantity = self._position_sizing(self.symbol)
@@ -59,15 +57,30 @@ class PriceActionStrategy(Strategy):
         return cash, last_price, quantity
 
     def _get_moving_averages(self, symbol) -> Tuple[float, float]:
-        """Calculate short and long moving averages for a symbol."""
-        close_prices = self.get_historical_prices(
-            symbol, self.ma_long_period, timestep="day"
-        ).df["close"]
+        """Short and long moving averages of a symbol, updated with the new daily bars."""
+        stream = self.daily_bars.get(symbol)
+        if stream is None:
+            stream = self.daily_bars[symbol] = BarStream(
+                lambda length: self._get_daily_bars(symbol, length),
+                self.ma_long_period,
+            )
 
-        short_ma = np.mean(close_prices[-self.ma_short_period :])
-        long_ma = np.mean(close_prices)
+        reset, bars = stream.poll()
+        if reset or symbol not in self.moving_averages:
+            self.moving_averages[symbol] = (
+                SMA(self.ma_short_period),
+                SMA(self.ma_long_period),
+            )
+        short_ma, long_ma = self.moving_averages[symbol]
+        for bar, revise in bars:
+            short_ma.update(bar.close, revise)
+            long_ma.update(bar.close, revise)
 
-        return short_ma, long_ma
+        return short_ma.value, long_ma.value
+
+    def _get_daily_bars(self, symbol: str, length: int) -> Optional[pd.DataFrame]:
+        bars = self.get_historical_prices(symbol, length, timestep="day")
+        return bars.df if bars is not None else None
 
     def _execute_buy_order(self, symbol: str, quantity: int, last_price: float):
         """Execute a buy order with dynamic stop-loss based on volatility."""
@@ -1,12 +1,12 @@
-from typing import Tuple
+from typing import Dict, Tuple
 from alpaca_trade_api import REST
 from lumibot.strategies.strategy import Strategy
+from strategies.iteration_cache import IterationCacheMixin
 from timedelta import Timedelta
 from sentiment.get_sentiment_and_news_cached import GetSentimentAndNewsCached
-import numpy as np
 
 
-class SentimentStrategy(Strategy):
+class SentimentStrategy(IterationCacheMixin, Strategy):
     """
     A trading strategy that makes decisions based on news sentiment and adjusts for market volatility and risk.
     """
@@ -19,13 +19,13 @@ class SentimentStrategy(Strategy):
         sleeptime: str = "24H",
         days_prior_for_news: int = 3,
         news_limit: int = 10,
+        news_dedup_threshold: float = None,
         sentiment_threshold: float = 0.999,
+        sentiment_aggregation: str = "sum",
         buy_take_profit_multiplier: float = 1.10,
         buy_stop_loss_multiplier: float = 0.97,
         sell_take_profit_multiplier: float = 0.9,
         sell_stop_loss_multiplier: float = 1.03,
-        volatility_threshold: float = 0.03,
-        volatility_period: int = 14,
         volatility_factor: float = 0.1,  # Ajout d'un facteur de volatilité
     ):
         self.symbols = symbols
@@ -37,37 +37,43 @@ class SentimentStrategy(Strategy):
         self.cash_at_risk = cash_at_risk
         self.days_prior_for_news = days_prior_for_news
         self.news_limit = news_limit
+        self.news_dedup_threshold = news_dedup_threshold
         self.get_news = get_news
 
         self.sentiment_threshold = sentiment_threshold
+        self.sentiment_aggregation = sentiment_aggregation
         self.buy_take_profit_multiplier = buy_take_profit_multiplier
         self.buy_stop_loss_multiplier = buy_stop_loss_multiplier
         self.sell_take_profit_multiplier = sell_take_profit_multiplier
         self.sell_stop_loss_multiplier = sell_stop_loss_multiplier
-        self.volatility_threshold = volatility_threshold
-        self.volatility_period = volatility_period
         self.volatility_factor = volatility_factor  # Ajout d'un facteur de volatilité
 
         print(f"Sleep time: {self.sleeptime}")
         print(f"Cash at risk: {self.cash_at_risk}")
         print(f"Days prior for news: {self.days_prior_for_news}")
         print(f"Sentiment threshold: {self.sentiment_threshold}")
+        print(f"Sentiment aggregation: {self.sentiment_aggregation}")
         print(f"Buy take profit multiplier: {self.buy_take_profit_multiplier}")
         print(f"Buy stop loss multiplier: {self.buy_stop_loss_multiplier}")
         print(f"Sell take profit multiplier: {self.sell_take_profit_multiplier}")
         print(f"Sell stop loss multiplier: {self.sell_stop_loss_multiplier}")
-        print(f"Volatility threshold: {self.volatility_threshold}")
-        print(f"Volatility period: {self.volatility_period}")
         print(f"News limit: {news_limit}")
+        print(f"News dedup threshold: {self.news_dedup_threshold}")
 
     def on_trading_iteration(self):
+        # Stop at the first symbol the cash cannot buy, before any news is fetched
+        sized = []
         for symbol in self.symbols:
             cash, last_price, quantity = self._position_sizing(symbol)
-            probability, sentiment = self._get_sentiment(symbol)
-
             if cash <= last_price:
-                return
-
+                break
+            sized.append((symbol, quantity, last_price))
+        if not sized:
+            return
+
+        sentiments = self._get_sentiments([symbol for symbol, _, _ in sized])
+        for symbol, quantity, last_price in sized:
+            probability, sentiment = sentiments[symbol]
             if sentiment == "positive" and probability > self.sentiment_threshold:
                 self._execute_buy_order(symbol, quantity, last_price)
             elif sentiment == "negative" and probability > self.sentiment_threshold:
@@ -77,6 +83,12 @@ class SentimentStrategy(Strategy):
         print(
             f"\n\nMoyenne d'articles par jour: {self._get_average_number_of_news()}\n\n"
         )
+        if self.news_dedup_threshold:
+            print(
+                f"Near-duplicate collapsing saved "
+                f"{GetSentimentAndNewsCached.forward_passes_saved} forward passes"
+            )
+        super().on_strategy_end()
 
     def _position_sizing(self, symbol) -> Tuple[float, float, int, float]:
         """Calculate the position size based on available cash, risk, and volatility."""
@@ -86,21 +98,30 @@ class SentimentStrategy(Strategy):
         quantity = round(cash * self.cash_at_risk / last_price, 0)
         return cash, last_price, quantity
 
-    def _get_sentiment(self, symbol) -> Tuple[float, str]:
-        """Get the sentiment of news headlines for a specific symbol."""
-        get_sentiment_and_news_cached = GetSentimentAndNewsCached(
-            symbol,
-            self.news_limit,
-            self.get_news,
-        )
-        _, probability, sentiment, number_of_news = (
-            get_sentiment_and_news_cached.get_news_and_sentiment(
-                self._get_new_date_interval()
+    def _get_sentiments(self, symbols: list) -> Dict[str, Tuple[float, str]]:
+        """Get the sentiment of news headlines for each symbol, scored in one batch."""
+        fetchers = [
+            GetSentimentAndNewsCached(
+                symbol,
+                self.news_limit,
+                self.get_news,
+                self.news_dedup_threshold,
+                self.sentiment_aggregation,
             )
+            for symbol in symbols
+        ]
+        results = GetSentimentAndNewsCached.get_news_and_sentiment_many(
+            fetchers, self._get_new_date_interval()
         )
-        self.number_of_news += number_of_news
-        self.number_of_news_calls += 1
-        return probability, sentiment
+
+        sentiments = {}
+        for symbol, (_, probability, sentiment, number_of_news) in zip(
+            symbols, results
+        ):
+            self.number_of_news += number_of_news
+            self.number_of_news_calls += 1
+            sentiments[symbol] = probability, sentiment
+        return sentiments
 
     def _get_new_date_interval(self) -> Tuple[str, str]:
         """Get the current date and the date X days prior."""
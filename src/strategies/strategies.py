@@ -4,6 +4,8 @@ from strategies.market_making_strategy import MarketMakingStrategy
 from strategies.fourier_transform_strategy import FourierTransformStrategy
 from strategies.improved_market_making_strategy import ImprovedMarketMakingStrategy
 from strategies.price_action_strategy import PriceActionStrategy
+from typing import Set
+import inspect
 
 STRATEGIES = {
     "sentiment": SentimentStrategy,
@@ -13,3 +15,11 @@ STRATEGIES = {
     "improved_market_making_strategy": ImprovedMarketMakingStrategy,
     "price_action": PriceActionStrategy,
 }
+
+
+def parameter_names(strategy_class) -> Set[str]:
+    """Parameters a strategy reads: the arguments of its initialize and its class parameters."""
+    names = set(getattr(strategy_class, "parameters", None) or {})
+    names.update(inspect.signature(strategy_class.initialize).parameters)
+    names.discard("self")
+    return names
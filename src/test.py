@@ -1,27 +1,17 @@
 from lumibot.backtesting import PandasDataBacktesting
 from strategies.fourier_transform_strategy import FourierTransformStrategy
 
-import pandas as pd
 from lumibot.backtesting import BacktestingBroker, PandasDataBacktesting
 from lumibot.entities import Asset, Data
-import yfinance as yf
 from lumibot.traders import Trader
+from utils.bar_store import load_bars
 
 if __name__ == "__main__":
     symbol = "SPY"
     period = "5d"
     interval = "1m"
-    filename = f"cache/data/{symbol}_{period}_{interval}.csv"
 
-    try:
-        df = pd.read_csv(filename)
-    except Exception:
-        # Download minute data from 2018 to now forf {symbol}
-        data = yf.download(symbol, period=period, interval=interval)
-        # Save the data to a CSV file
-        data.to_csv(filename)
-
-    df = pd.read_csv(filename)
+    df = load_bars(symbol, period, interval)
     print(df.columns)
     asset = Asset(
         symbol=symbol,
@@ -0,0 +1,30 @@
+import pandas as pd
+
+
+def lumibot_data(symbol: str, bars: pd.DataFrame, interval: str = "1m"):
+    """lumibot pandas data of normalised bars, with its backtesting start and end."""
+    from lumibot.entities import Asset, Data
+
+    asset = Asset(
+        symbol=symbol,
+        asset_type=Asset.AssetType.STOCK,
+    )
+    pandas_data = {}
+    pandas_data[asset] = Data(
+        asset,
+        bars,
+        timestep="day" if interval.endswith("d") else "minute",
+    )
+    backtesting_start = pandas_data[asset].datetime_start
+    backtesting_end = pandas_data[asset].datetime_end
+
+    return pandas_data, backtesting_start, backtesting_end
+
+
+def backtrader_feed(bars: pd.DataFrame):
+    """backtrader feed of normalised bars."""
+    import backtrader as bt
+
+    # backtrader works on naive datetimes; the bars are in UTC
+    bars = bars.set_axis(bars.index.tz_localize(None))
+    return bt.feeds.PandasData(dataname=bars)
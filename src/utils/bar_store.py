@@ -0,0 +1,280 @@
+from typing import Callable, List, Optional, Tuple
+import json
+import os
+import pandas as pd
+import threading
+
+BAR_CACHE_DIR = "cache/data"
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+PERIODS = {"d": "1D", "wk": "7D", "mo": "30D", "y": "365D"}
+INTERVALS = {"m": "1min", "h": "1h", "d": "1D", "wk": "7D", "mo": "30D"}
+
+# Bars younger than this may still be forming or not be published yet
+SETTLE_DELAY = pd.Timedelta(days=1)
+
+
+def normalize_bars(df: pd.DataFrame, dtype: str = "float64") -> pd.DataFrame:
+    """
+    OHLCV frame with lowercase columns, a UTC DatetimeIndex named "datetime"
+    sorted without duplicates, and float columns of the given dtype.
+    """
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance returns (price, ticker) columns
+        df.columns = df.columns.get_level_values(0)
+    df.columns = [str(column).lower() for column in df.columns]
+    df = df[[column for column in BAR_COLUMNS if column in df.columns]]
+
+    index = df.index
+    if isinstance(index, pd.MultiIndex):
+        # Alpaca returns (symbol, timestamp) rows, one symbol per frame here
+        symbols = index.get_level_values(0).unique()
+        if len(symbols) > 1:
+            raise ValueError(
+                f"Bars of several symbols in one frame: {', '.join(map(str, symbols))}"
+            )
+        index = index.get_level_values(-1)
+    df.index = pd.DatetimeIndex(pd.to_datetime(index, utc=True), name="datetime")
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df.astype(dtype)
+
+
+def read_bars(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path, engine="pyarrow", memory_map=True)
+
+
+def write_bars(df: pd.DataFrame, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path, engine="pyarrow", compression="snappy")
+
+
+def yahoo_downloader(
+    symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str
+) -> pd.DataFrame:
+    import yfinance as yf
+
+    return yf.download(symbol, start=start, end=end, interval=interval)
+
+
+def alpaca_crypto_downloader(
+    symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str
+) -> pd.DataFrame:
+    from alpaca.data import CryptoHistoricalDataClient
+    from alpaca.data.requests import CryptoBarsRequest
+    from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+    units = {"m": TimeFrameUnit.Minute, "h": TimeFrameUnit.Hour, "d": TimeFrameUnit.Day}
+    amount = interval.rstrip("mhd")
+    request = CryptoBarsRequest(
+        symbol_or_symbols=symbol,
+        timeframe=TimeFrame(int(amount), units[interval[len(amount) :]]),
+        start=start,
+        end=end,
+    )
+    return CryptoHistoricalDataClient().get_crypto_bars(request).df
+
+
+class BarStore:
+    """
+    Bars of one symbol and interval, stored in a single Parquet file with the
+    time ranges already downloaded. Requests for a [start, end] slice only
+    download the parts of the range that are not covered yet.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        symbol: str,
+        interval: str = "1m",
+        downloader: Callable = yahoo_downloader,
+        cache_dir: str = BAR_CACHE_DIR,
+    ):
+        self.symbol = symbol
+        self.interval = interval
+        self.downloader = downloader
+        # Crypto pairs such as BTC/USD must not create sub-directories
+        name = f"{cache_dir}/{symbol.replace('/', '-')}_{interval}"
+        self.path = f"{name}.parquet"
+        self.coverage_path = f"{name}.coverage.json"
+        # Gaps shorter than one bar cannot contain a new bar
+        self.min_gap = parse_interval(interval)
+        self._lock = threading.Lock()
+        self.bars: Optional[pd.DataFrame] = None
+        self.coverage: List[List[pd.Timestamp]] = []
+        self._load()
+
+    @classmethod
+    def open(
+        cls,
+        symbol: str,
+        interval: str = "1m",
+        downloader: Callable = yahoo_downloader,
+        cache_dir: str = BAR_CACHE_DIR,
+    ) -> "BarStore":
+        """Shared store of a symbol and interval; the downloader of the first call is kept."""
+        key = (symbol, interval, cache_dir)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(symbol, interval, downloader, cache_dir)
+            return cls._instances[key]
+
+    def get(self, start, end, dtype: str = "float64") -> pd.DataFrame:
+        """Bars in [start, end], downloading the uncovered parts first."""
+        start, end = _utc(start), _utc(end)
+        with self._lock:
+            gaps = self.gaps(start, end)
+            settled = pd.Timestamp.now(tz="UTC") - SETTLE_DELAY
+            for gap_start, gap_end in gaps:
+                downloaded = self.downloader(
+                    self.symbol, gap_start, gap_end, self.interval
+                )
+                if downloaded is not None and not downloaded.empty:
+                    self._merge(downloaded, gap_start, gap_end)
+                elif downloaded is not None and gap_end < settled:
+                    # Settled spans without bars (weekends, holidays) stay empty
+                    self._cover(gap_start, gap_end)
+            if gaps:
+                self._save()
+            bars = self.bars
+        return bars.loc[start:end].astype(dtype)
+
+    def gaps(self, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple]:
+        """Parts of [start, end] not covered by earlier downloads."""
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.coverage:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start - cursor >= self.min_gap:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if end - cursor >= self.min_gap:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _merge(self, df: pd.DataFrame, start, end):
+        df = normalize_bars(df)
+        bars = df if self.bars is None else pd.concat([self.bars, df])
+        self.bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+
+        now = pd.Timestamp.now(tz="UTC")
+        if end >= now - SETTLE_DELAY:
+            # Recent spans are only covered up to the last bar returned, which
+            # is downloaded again next time
+            end = max(start, min(end, now, df.index[-1]))
+        self._cover(start, end)
+
+    def _cover(self, start, end):
+        """Adds [start, end] to the ranges already downloaded."""
+        merged = []
+        for covered_start, covered_end in sorted(self.coverage + [[start, end]]):
+            if merged and covered_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], covered_end)
+            else:
+                merged.append([covered_start, covered_end])
+        self.coverage = merged
+
+    def _load(self):
+        if os.path.exists(self.path) and os.path.exists(self.coverage_path):
+            self.bars = read_bars(self.path)
+            with open(self.coverage_path, "r") as f:
+                self.coverage = [[_utc(a), _utc(b)] for a, b in json.load(f)]
+        else:
+            self.bars = normalize_bars(pd.DataFrame(columns=BAR_COLUMNS))
+
+    def _save(self):
+        write_bars(self.bars, self.path)
+        # The coverage is written last, so a crash can only under-report it
+        temporary_path = self.coverage_path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump([[a.isoformat(), b.isoformat()] for a, b in self.coverage], f)
+        os.replace(temporary_path, self.coverage_path)
+
+
+def load_bars(
+    symbol: str,
+    period: str = "5d",
+    interval: str = "1m",
+    dtype: str = "float64",
+    start=None,
+    end=None,
+    base_interval: Optional[str] = None,
+    downloader: Callable = yahoo_downloader,
+) -> pd.DataFrame:
+    """
+    Bars of a symbol over [start, end], or over the last period when no
+    start is given, served by the symbol's BarStore. A legacy per-period
+    cache file is imported into the store the first time it is opened.
+
+    With a base_interval, the bars are resampled locally from the bars of
+    that interval instead of being downloaded separately.
+    """
+    if base_interval and base_interval != interval:
+        from utils.resample import resampled_store
+
+        base = BarStore.open(symbol, base_interval, downloader)
+        store = resampled_store(symbol, interval, base)
+    else:
+        store = BarStore.open(symbol, interval, downloader)
+    end = _utc(end) if end is not None else pd.Timestamp.now(tz="UTC")
+    start = _utc(start) if start is not None else end - parse_period(period)
+
+    if not store.coverage:
+        _import_legacy_cache(store, f"{BAR_CACHE_DIR}/{symbol}_{period}_{interval}")
+    return store.get(start, end, dtype)
+
+
+def parse_period(period: str) -> pd.Timedelta:
+    """Length of a Yahoo Finance period such as "5d", "1mo" or "2y"."""
+    return _parse_duration(period, PERIODS)
+
+
+def parse_interval(interval: str) -> pd.Timedelta:
+    """Length of a Yahoo Finance interval such as "1m", "1h" or "1d"."""
+    return _parse_duration(interval, INTERVALS)
+
+
+def _parse_duration(text: str, units: dict) -> pd.Timedelta:
+    number = text.rstrip("abcdefghijklmnopqrstuvwxyz")
+    unit = text[len(number) :]
+    if not number.isdigit() or unit not in units:
+        raise ValueError(f"Unknown duration: {text}")
+    return int(number) * pd.Timedelta(units[unit])
+
+
+def _utc(timestamp) -> pd.Timestamp:
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def _import_legacy_cache(store: BarStore, path: str):
+    df = None
+    if os.path.exists(path + ".parquet"):
+        df = read_bars(path + ".parquet")
+    elif os.path.exists(path + ".csv"):
+        df = _read_legacy_csv(path + ".csv")
+    if df is None or df.empty:
+        return
+    df = normalize_bars(df)
+    with store._lock:
+        store._merge(df, df.index[0], df.index[-1])
+        store._save()
+
+
+def _read_legacy_csv(path: str):
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_csv(path, index_col=0)
+        # yfinance >= 0.2.48 writes extra "Ticker" and "Datetime" header rows
+        df = df[pd.to_datetime(df.index, errors="coerce", utc=True).notna()]
+    except ValueError:
+        return None
+    return df.apply(pd.to_numeric, errors="coerce") if not df.empty else None
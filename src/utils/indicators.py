@@ -0,0 +1,256 @@
+"""
+Streaming indicators updated in constant time per bar.
+
+Every indicator takes update(..., revise=False). With revise=True the value
+replaces the input of the latest update instead of adding a new one, for
+bars that are still forming. To bound floating-point drift, the running
+sums are recomputed from their window once per window length, so results
+agree with the numpy/pandas equivalents to within float tolerance rather
+than bit for bit.
+"""
+
+from typing import Callable, List, Optional, Tuple
+import math
+import pandas as pd
+
+
+class RingBuffer:
+    """The latest size values, oldest first."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = [0.0] * size
+        self.count = 0
+        self.position = 0
+
+    def push(self, value: float) -> Optional[float]:
+        """Append a value, returning the one it evicted once the buffer is full."""
+        evicted = self.values[self.position] if self.full else None
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        return evicted
+
+    def replace_last(self, value: float) -> float:
+        """Replace the latest value, returning the one it replaced."""
+        last = (self.position - 1) % self.size
+        replaced, self.values[last] = self.values[last], value
+        return replaced
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def window(self) -> List[float]:
+        if not self.full:
+            return self.values[: self.count]
+        return self.values[self.position :] + self.values[: self.position]
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class SMA:
+    """Simple moving average; NaN until min_periods values were seen."""
+
+    def __init__(self, period: int, min_periods: int = 1):
+        self.window = RingBuffer(period)
+        self.min_periods = min_periods
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value: float, revise: bool = False) -> float:
+        if revise and len(self.window):
+            self.total += value - self.window.replace_last(value)
+        else:
+            evicted = self.window.push(value)
+            self.total += value - (evicted if evicted is not None else 0.0)
+            self.updates += 1
+            if self.updates % self.window.size == 0:
+                self.total = math.fsum(self.window.values)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self.window) < max(1, self.min_periods):
+            return math.nan
+        return self.total / len(self.window)
+
+
+class EMA:
+    """Exponential moving average with alpha = 2 / (period + 1), seeded with the first value."""
+
+    def __init__(self, period: int):
+        self.alpha = 2 / (period + 1)
+        self.value = math.nan
+        self.previous = math.nan
+
+    def update(self, value: float, revise: bool = False) -> float:
+        if not revise:
+            self.previous = self.value
+        if math.isnan(self.previous):
+            self.value = value
+        else:
+            self.value = self.previous + self.alpha * (value - self.previous)
+        return self.value
+
+
+class RollingStd:
+    """Rolling standard deviation with Welford's updates for a sliding window."""
+
+    def __init__(self, period: int, ddof: int = 0):
+        self.window = RingBuffer(period)
+        self.ddof = ddof
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, value: float, revise: bool = False) -> float:
+        if revise and len(self.window):
+            self._swap(self.window.replace_last(value), value)
+            return self.value
+
+        evicted = self.window.push(value)
+        if evicted is None:
+            delta = value - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (value - self.mean)
+        else:
+            self._swap(evicted, value)
+        self.updates += 1
+        if self.updates % self.window.size == 0:
+            self._resync()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        count = len(self.window)
+        if count <= self.ddof:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (count - self.ddof))
+
+    def _swap(self, old: float, new: float):
+        """Replace one value of the window by another, keeping its length."""
+        previous_mean = self.mean
+        self.mean += (new - old) / len(self.window)
+        self.m2 += (new - old) * (new - self.mean + old - previous_mean)
+
+    def _resync(self):
+        values = self.window.window()
+        self.mean = math.fsum(values) / len(values)
+        self.m2 = math.fsum((value - self.mean) ** 2 for value in values)
+
+
+class LogReturns:
+    """Log return of each close over the previous one; None for the first close."""
+
+    def __init__(self):
+        self.previous_close = None
+        self.last_close = None
+
+    def update(self, close: float, revise: bool = False) -> Optional[float]:
+        if not revise:
+            self.previous_close = self.last_close
+        self.last_close = close
+        if self.previous_close is None:
+            return None
+        return math.log(close / self.previous_close)
+
+
+class ATR:
+    """
+    Average true range: the simple moving average of the true range over the
+    period, NaN until period bars were seen. The first bar's true range is
+    its high - low.
+    """
+
+    def __init__(self, period: int):
+        self.average = SMA(period, min_periods=period)
+        self.previous_close = None
+        self.last_close = None
+
+    def update(
+        self, high: float, low: float, close: float, revise: bool = False
+    ) -> float:
+        if not revise:
+            self.previous_close = self.last_close
+        self.last_close = close
+
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(
+                true_range,
+                abs(high - self.previous_close),
+                abs(low - self.previous_close),
+            )
+        return self.average.update(true_range, revise)
+
+    @property
+    def value(self) -> float:
+        return self.average.value
+
+
+class Crossover:
+    """
+    Tracks whether a fast series is above a slow one. value is 1 on the bar
+    the fast series crosses above, -1 when it crosses below, 0 otherwise.
+    """
+
+    def __init__(self):
+        self.previous_above = None
+        self.above = None
+        self.value = 0
+
+    def update(self, fast: float, slow: float, revise: bool = False) -> int:
+        if not revise:
+            self.previous_above = self.above
+        # NaN compares as not above, like the pandas comparisons it replaces
+        self.above = fast > slow if not math.isnan(fast - slow) else None
+
+        if self.previous_above is None or self.above is None:
+            self.value = 0
+        else:
+            self.value = int(self.above) - int(self.previous_above)
+        return self.value
+
+
+class BarStream:
+    """
+    Hands each bar of a growing series to indicators once. The first poll
+    fetches warmup bars; later polls fetch the last few bars and return the
+    ones after the latest bar seen, plus that bar again as a revision in case
+    it was still forming. When the fetched bars do not reach back to the
+    latest bar seen, bars may have been missed and the stream starts over.
+    """
+
+    def __init__(
+        self,
+        get_bars: Callable[[int], Optional[pd.DataFrame]],
+        warmup: int,
+        lookback: int = 5,
+    ):
+        self.get_bars = get_bars
+        self.warmup = warmup
+        self.lookback = lookback
+        self.last_seen = None
+
+    def poll(self) -> Tuple[bool, List[Tuple[object, bool]]]:
+        """
+        Whether indicators must be reset, and the (bar, revise) pairs to
+        apply in order. Bars are rows of the fetched frame.
+        """
+        reset = self.last_seen is None
+        bars = self.get_bars(self.warmup if reset else self.lookback)
+        if bars is None or bars.empty:
+            return False, []
+
+        if not reset and bars.index[0] > self.last_seen:
+            reset = True
+            bars = self.get_bars(self.warmup)
+
+        if not reset:
+            bars = bars[bars.index >= self.last_seen]
+        last_seen, self.last_seen = self.last_seen, bars.index[-1]
+        return reset, [
+            (bar, not reset and bar.Index == last_seen) for bar in bars.itertuples()
+        ]
@@ -0,0 +1,62 @@
+from utils.bar_store import BAR_CACHE_DIR, BarStore, parse_interval
+import numpy as np
+import pandas as pd
+
+RESAMPLED_CACHE_DIR = f"{BAR_CACHE_DIR}/resampled"
+
+
+def resample_bars(bars: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    OHLCV bars of a coarser interval, bucketed by flooring the (sorted, UTC)
+    timestamps. Daily buckets start at midnight UTC and weekly buckets on
+    Thursdays, counting from the Unix epoch.
+    """
+    if bars.empty:
+        return bars
+
+    # Integer arithmetic in the index's own unit avoids converting the index
+    unit = bars.index.unit
+    step = parse_interval(interval) // pd.Timedelta(1, unit=unit)
+    times = bars.index.asi8
+    buckets = times - times % step
+    # The index is sorted, so every bucket is a contiguous run of rows
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    columns = {
+        "open": lambda values: values[starts],
+        "high": lambda values: np.maximum.reduceat(values, starts),
+        "low": lambda values: np.minimum.reduceat(values, starts),
+        "close": lambda values: values[ends],
+        "volume": lambda values: np.add.reduceat(values, starts),
+    }
+    return pd.DataFrame(
+        {
+            column: reduce(bars[column].to_numpy())
+            for column, reduce in columns.items()
+            if column in bars.columns
+        },
+        index=pd.DatetimeIndex(
+            buckets[starts].astype(f"datetime64[{unit}]"), name=bars.index.name
+        ).tz_localize("UTC"),
+    )
+
+
+def resampled_store(
+    symbol: str, interval: str, base: BarStore, cache_dir: str = RESAMPLED_CACHE_DIR
+) -> BarStore:
+    """
+    BarStore of the given interval whose missing spans are built from the
+    bars of the base store instead of being downloaded.
+    """
+    step = parse_interval(interval)
+
+    def downloader(symbol, start, end, interval):
+        # Whole buckets only, so no bucket is built from part of its bars,
+        # except the current one, which is built again until it is complete
+        start = start.floor(step)
+        end = min(end.ceil(step), pd.Timestamp.now(tz="UTC"))
+        bars = base.get(start, end)
+        return resample_bars(bars[bars.index < end], interval)
+
+    return BarStore.open(symbol, interval, downloader, f"{cache_dir}/{base.interval}")
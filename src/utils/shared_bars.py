@@ -0,0 +1,96 @@
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple
+import numpy as np
+import pandas as pd
+import sys
+
+
+class SharedBarsInfo(NamedTuple):
+    """What a worker process needs to attach to published bars; cheap to pickle."""
+
+    name: str
+    rows: int
+    columns: List[str]
+    dtype: str
+    unit: str
+
+
+# Blocks mapped by this process, published or attached, by name
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedBars:
+    """
+    Publishes OHLCV frames into shared memory once, so that worker processes
+    attach to them instead of each loading and unpickling the bars. The
+    publishing process owns the memory and frees it on close.
+
+    A block holds the int64 timestamps followed by the columns, each stored
+    contiguously. The columns of attached frames are views on the block; only
+    the timestamps are copied, as localising them to UTC allocates. lumibot's
+    Data still copies the rows it keeps when a backtest builds its data
+    source, so each running backtest holds its own copy of the bars.
+    """
+
+    def __init__(self):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.infos: Dict[str, SharedBarsInfo] = {}
+
+    def publish(self, symbol: str, bars: pd.DataFrame) -> SharedBarsInfo:
+        dtype = np.dtype(bars.dtypes.iloc[0]) if len(bars.columns) else np.float64
+        rows, columns = len(bars), list(bars.columns)
+        block = shared_memory.SharedMemory(
+            create=True, size=max(1, rows * (8 + dtype.itemsize * len(columns)))
+        )
+        times, values = _views(block, rows, len(columns), dtype)
+        times[:] = bars.index.asi8
+        values[:] = bars.to_numpy(dtype=dtype).T
+
+        info = SharedBarsInfo(block.name, rows, columns, dtype.str, bars.index.unit)
+        self.blocks[symbol], self.infos[symbol] = block, info
+        _attached[block.name] = block
+        return info
+
+    def close(self):
+        for block in self.blocks.values():
+            _attached.pop(block.name, None)
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+        self.infos.clear()
+
+    def __enter__(self) -> "SharedBars":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_bars(info: SharedBarsInfo) -> pd.DataFrame:
+    """Read-only frame whose columns are views on bars published by another process."""
+    block = _attached.get(info.name)
+    if block is None:
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(info.name, track=False)
+        else:
+            block = shared_memory.SharedMemory(info.name)
+            # Before 3.13 attaching also registers the block with this process'
+            # resource tracker, which would unlink it when the worker exits
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(block._name, "shared_memory")
+        # Frames only hold views, so the mapping must outlive them
+        _attached[info.name] = block
+
+    times, values = _views(block, info.rows, len(info.columns), np.dtype(info.dtype))
+    times.flags.writeable = values.flags.writeable = False
+    index = pd.DatetimeIndex(
+        times.view(f"datetime64[{info.unit}]"), name="datetime", copy=False
+    ).tz_localize("UTC")
+    return pd.DataFrame(values.T, index=index, columns=info.columns, copy=False)
+
+
+def _views(block: shared_memory.SharedMemory, rows: int, columns: int, dtype):
+    times = np.ndarray((rows,), dtype=np.int64, buffer=block.buf)
+    values = np.ndarray((columns, rows), dtype=dtype, buffer=block.buf, offset=rows * 8)
+    return times, values
@@ -0,0 +1,101 @@
+from typing import Optional, Sequence
+import numpy as np
+
+
+class SlidingDFT:
+    """
+    The lowest frequency bins of the DFT of the last window_size values of
+    several series at once. Once a window is full, a new value updates the
+    bins in O(bins) with X_k <- (X_k - oldest + newest) * exp(2 pi i k / N).
+    Bins are recomputed directly once per window length to bound the
+    rounding drift of the recurrence, and while a window is still filling.
+    """
+
+    def __init__(self, series: int, window_size: int, bins: int = 5):
+        self.window_size = window_size
+        self.bins = bins
+        self.values = np.zeros((series, window_size))
+        self.counts = np.zeros(series, dtype=int)
+        self.positions = np.zeros(series, dtype=int)
+        self.updates = np.zeros(series, dtype=int)
+        self.coefficients = np.zeros((series, bins), dtype=complex)
+
+        k = np.arange(bins)
+        self.shift = np.exp(2j * np.pi * k / window_size)
+        # Contribution of the newest value, at index N - 1 of a full window
+        self.last_basis = np.exp(-2j * np.pi * k * (window_size - 1) / window_size)
+
+    def reset(self, series: int, values: Sequence[float]):
+        """Replace the window of one series with its latest values."""
+        values = np.asarray(values, dtype=float)[-self.window_size :]
+        self.values[series, : len(values)] = values
+        self.counts[series] = len(values)
+        self.positions[series] = len(values) % self.window_size
+        self._recompute(np.array([series]))
+
+    def push(self, values: np.ndarray, mask: Optional[np.ndarray] = None):
+        """Append values[i] to every series i selected by mask."""
+        rows = np.arange(len(values)) if mask is None else np.flatnonzero(mask)
+        full = rows[self.counts[rows] == self.window_size]
+        positions = self.positions[rows]
+
+        oldest = self.values[full, self.positions[full]]
+        self.coefficients[full] = (
+            self.coefficients[full] + (values[full] - oldest)[:, None]
+        ) * self.shift
+
+        self.values[rows, positions] = values[rows]
+        self.positions[rows] = (positions + 1) % self.window_size
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.window_size)
+        self.updates[full] += 1
+
+        # Windows still filling are recomputed, as their length changed
+        filling = np.setdiff1d(rows, full)
+        resync = full[self.updates[full] % self.window_size == 0]
+        stale = np.concatenate([filling, resync])
+        if len(stale):
+            self._recompute(stale)
+
+    def revise(self, values: np.ndarray, mask: Optional[np.ndarray] = None):
+        """Replace the newest value of every series selected by mask with values[i]."""
+        rows = np.arange(len(values)) if mask is None else np.flatnonzero(mask)
+        rows = rows[self.counts[rows] > 0]
+        last = (self.positions[rows] - 1) % self.window_size
+        previous = self.values[rows, last]
+        self.values[rows, last] = values[rows]
+
+        full = self.counts[rows] == self.window_size
+        self.coefficients[rows[full]] += (values[rows[full]] - previous[full])[
+            :, None
+        ] * self.last_basis
+        if not full.all():
+            self._recompute(rows[~full])
+
+    def last_values(self) -> np.ndarray:
+        """
+        Real part of the inverse DFT of the kept bins at the newest point of
+        each window; NaN for empty series.
+        """
+        n = self.counts[:, None]
+        k = np.arange(self.bins)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            basis = np.where(
+                k < n, np.exp(2j * np.pi * k * (n - 1) / np.maximum(n, 1)), 0
+            )
+            signal = (self.coefficients * basis).sum(axis=1).real / self.counts
+        signal[self.counts == 0] = np.nan
+        return signal
+
+    def _recompute(self, rows: np.ndarray):
+        for row in rows:
+            count = self.counts[row]
+            if count == self.window_size:
+                window = np.roll(self.values[row], -self.positions[row])
+            else:
+                window = self.values[row, :count]
+            k = np.arange(self.bins)[:, None]
+            basis = np.exp(-2j * np.pi * k * np.arange(count)[None, :] / max(count, 1))
+            coefficients = basis @ window
+            # Bins beyond the window length do not exist
+            coefficients[count:] = 0
+            self.coefficients[row] = coefficients
@@ -0,0 +1,182 @@
+from typing import Dict, Iterable, List
+import itertools
+import math
+import random
+import pandas as pd
+
+
+def _above(value):
+    return 1 + value
+
+
+def _below(value):
+    return 1 - value
+
+
+def _same(value):
+    return value
+
+
+# Sweepable command line flags, by short name: (args attribute, type, the
+# strategy parameters the flag sets with the function of its value giving them)
+SWEEP_PARAMETERS = {
+    "tp": (
+        "take_profit_threshold",
+        float,
+        {
+            "take_profit_multiplier": _above,
+            "buy_take_profit_multiplier": _above,
+            "sell_take_profit_multiplier": _below,
+        },
+    ),
+    "sl": (
+        "stop_loss_threshold",
+        float,
+        {
+            "stop_loss_multiplier": _below,
+            "buy_stop_loss_multiplier": _below,
+            "sell_stop_loss_multiplier": _above,
+        },
+    ),
+    "sthr": ("sentiment_threshold", float, {"sentiment_threshold": _same}),
+    "vp": ("volatility_period", int, {"volatility_period": _same}),
+    "c": ("cash_at_risk", float, {"cash_at_risk": _same}),
+}
+
+# Ranking metrics, True when higher is better
+SWEEP_METRICS = {
+    "sharpe": True,
+    "cagr": True,
+    "total_return": True,
+    "romad": True,
+    "volatility": False,
+    "max_drawdown": False,
+}
+
+
+class ParameterSpec:
+    """
+    Values of one swept parameter, from "NAME=SPEC" where SPEC is a list
+    "a,b,c", a grid range "low:high:step" (high included), or a random
+    search range "low:high".
+    """
+
+    def __init__(self, spec: str):
+        name, _, values = spec.partition("=")
+        if name not in SWEEP_PARAMETERS or not values:
+            raise ValueError(
+                f"Invalid sweep parameter: {spec} "
+                f"(expected NAME=SPEC with NAME in {', '.join(SWEEP_PARAMETERS)})"
+            )
+        self.name = name
+        self.attribute, self.type, self.targets = SWEEP_PARAMETERS[name]
+        self.values = None
+        self.bounds = None
+
+        if ":" not in values:
+            self.values = [self.type(value) for value in values.split(",")]
+            return
+        bounds = [self.type(value) for value in values.split(":")]
+        if len(bounds) == 2:
+            self.bounds = tuple(bounds)
+        elif len(bounds) == 3 and bounds[2] > 0:
+            low, high, step = bounds
+            count = int(math.floor((high - low) / step + 1e-9)) + 1
+            self.values = [self.type(round(low + i * step, 10)) for i in range(count)]
+        else:
+            raise ValueError(f"Invalid sweep range: {spec}")
+
+    def sample(self, rng: random.Random):
+        if self.values is not None:
+            return rng.choice(self.values)
+        low, high = self.bounds
+        if self.type is int:
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+
+
+def check_specs(specs: List[ParameterSpec], strategy: str, parameters: Iterable[str]):
+    """Rejects the specs setting none of a strategy's parameters."""
+    parameters = set(parameters)
+    sweepable = [
+        name
+        for name, (_, _, targets) in SWEEP_PARAMETERS.items()
+        if parameters & set(targets)
+    ]
+    for spec in specs:
+        if spec.name not in sweepable:
+            raise ValueError(
+                f"The {strategy} strategy has no parameter set by {spec.name} "
+                f"(sweepable: {', '.join(sweepable) or 'none'})"
+            )
+
+
+def strategy_overrides(
+    combination: Dict[str, object], parameters: Iterable[str]
+) -> Dict[str, object]:
+    """The strategy parameters, among the given ones, set by a combination."""
+    parameters = set(parameters)
+    overrides = {}
+    for attribute, _, targets in SWEEP_PARAMETERS.values():
+        if attribute not in combination:
+            continue
+        for target, function in targets.items():
+            if target in parameters:
+                overrides[target] = function(combination[attribute])
+    return overrides
+
+
+def grid_combinations(specs: List[ParameterSpec]) -> List[Dict[str, object]]:
+    """Every combination of the specs' values, keyed by args attribute."""
+    for spec in specs:
+        if spec.values is None:
+            raise ValueError(
+                f"{spec.name} has a random search range; use low:high:step for a grid"
+            )
+    return [
+        {spec.attribute: value for spec, value in zip(specs, values)}
+        for values in itertools.product(*(spec.values for spec in specs))
+    ]
+
+
+def random_combinations(
+    specs: List[ParameterSpec], samples: int, seed: int = None
+) -> List[Dict[str, object]]:
+    """samples distinct random combinations, fewer when the space is smaller."""
+    rng = random.Random(seed)
+    combinations, seen = [], set()
+    # Give up on duplicates drawn from small lists after enough attempts
+    for _ in range(samples * 20):
+        if len(combinations) == samples:
+            break
+        combination = {spec.attribute: spec.sample(rng) for spec in specs}
+        key = tuple(combination.values())
+        if key not in seen:
+            seen.add(key)
+            combinations.append(combination)
+    return combinations
+
+
+def result_metrics(results) -> Dict[str, float]:
+    """The SWEEP_METRICS of lumibot backtest results, NaN when missing."""
+    results = results or {}
+    metrics = {}
+    for name in SWEEP_METRICS:
+        value = results.get(name, math.nan)
+        if isinstance(value, dict):
+            # lumibot reports the drawdown with its date
+            value = value.get("drawdown", math.nan)
+        metrics[name] = math.nan if value is None else float(value)
+    return metrics
+
+
+def rank_results(rows: List[Dict[str, object]], metric: str) -> pd.DataFrame:
+    """One row per run, best first by metric; failed runs last."""
+    table = pd.DataFrame(rows)
+    if metric not in table:
+        table[metric] = math.nan
+    table = table.sort_values(
+        metric, ascending=not SWEEP_METRICS[metric], na_position="last"
+    )
+    table.insert(0, "rank", range(1, len(table) + 1))
+    return table.reset_index(drop=True)
@@ -1,37 +1,65 @@
-from alpaca_trade_api import REST
-from strategies.strategies import STRATEGIES
+from contextlib import contextmanager
+from sentiment.news_client import NewsClient
+from sentiment.news_range_provider import range_news_provider
+from strategies.strategies import STRATEGIES, parameter_names
+from utils.bar_feeds import lumibot_data
+from utils.bar_store import load_bars
+from utils.shared_bars import SharedBarsInfo, attach_bars
 from utils.broker_fees import BROKER_FEES
 from lumibot.brokers import Alpaca, Broker
 from lumibot.strategies.strategy import Strategy
 
-import pandas as pd
 from lumibot.backtesting import BacktestingBroker, PandasDataBacktesting
-from lumibot.entities import Asset, Data
 from lumibot.strategies import Strategy
-import yfinance as yf
 
 
 def build_parameters(args: dict, credentials: dict) -> dict:
-    """Builds the parameters dictionary for the strategy."""
-    return {
-        "get_news": REST(
-            base_url=credentials["BASE_URL"],
-            key_id=credentials["API_KEY"],
-            secret_key=credentials["API_SECRET"],
-        ).get_news,
+    """Builds the parameters dictionary of the strategy, with only the ones it reads."""
+    names = parameter_names(STRATEGIES[args.strategy])
+    parameters = {
+        "symbol": args.symbol,
         "symbols": ["SPY", "QQQ", "DIA", "AAPL"],
         "sleeptime": args.sleeptime,
         "days_prior_for_news": args.days_prior,
         "news_limit": args.news_limit,
+        "news_dedup_threshold": args.dedup_threshold,
         "cash_at_risk": args.cash_at_risk,
         "sentiment_threshold": args.sentiment_threshold,
+        "sentiment_aggregation": args.sentiment_aggregation,
         "buy_take_profit_multiplier": 1 + args.take_profit_threshold,
         "buy_stop_loss_multiplier": 1 - args.stop_loss_threshold,
         "sell_take_profit_multiplier": 1 - args.take_profit_threshold,
         "sell_stop_loss_multiplier": 1 + args.stop_loss_threshold,
-        "volatility_threshold": args.volatility_threshold,
         "volatility_period": args.volatility_period,
     }
+    if "get_news" in names:
+        parameters["get_news"] = _news_client(args, credentials)
+    return {name: value for name, value in parameters.items() if name in names}
+
+
+def _news_client(args: dict, credentials: dict):
+    get_news = NewsClient(
+        key_id=credentials["API_KEY"],
+        secret_key=credentials["API_SECRET"],
+        max_concurrency=args.news_concurrency,
+    )
+    if getattr(args, "start_date", None) is not None:
+        # Backtests download each symbol's news once and slice it locally
+        get_news = range_news_provider(
+            get_news, args.start_date, args.end_date, args.days_prior
+        )
+    return get_news
+
+
+@contextmanager
+def open_parameters(args: dict, credentials: dict):
+    """build_parameters, closing the news client once the block exits."""
+    parameters = build_parameters(args, credentials)
+    try:
+        yield parameters
+    finally:
+        if "get_news" in parameters:
+            parameters["get_news"].close()
 
 
 def create_broker(credentials: dict) -> Broker:
@@ -60,30 +88,21 @@ def create_trading_fees(args: dict):
     return BROKER_FEES.get(args.fees, {})
 
 
-def get_symbol_data(symbol: str, period: str = "5d", interval: str = "1m"):
-    filename = f"cache/data/{symbol}_{period}_{interval}.csv"
-    try:
-        df = pd.read_csv(filename)
-    except Exception:
-        # Download minute data from 2018 to now forf {symbol}
-        data = yf.download(symbol, period=period, interval=interval)
-
-        print(filename)
-        # Save the data to a CSV file
-        data.to_csv(filename)
-        df = pd.read_csv(filename)
-
-    asset = Asset(
-        symbol=symbol,
-        asset_type=Asset.AssetType.STOCK,
-    )
-    pandas_data = {}
-    pandas_data[asset] = Data(
-        asset,
-        df,
-        timestep="minute",
+def get_symbol_data(
+    symbol: str,
+    period: str = "5d",
+    interval: str = "1m",
+    start=None,
+    end=None,
+    base_interval: str = None,
+):
+    df = load_bars(
+        symbol, period, interval, start=start, end=end, base_interval=base_interval
     )
-    backtesting_start = pandas_data[asset].datetime_start
-    backtesting_end = pandas_data[asset].datetime_end
 
-    return pandas_data, backtesting_start, backtesting_end
+    return lumibot_data(symbol, df, interval)
+
+
+def attach_symbol_data(symbol: str, info: SharedBarsInfo, interval: str = "1m"):
+    """Same as get_symbol_data, over bars published in shared memory by SharedBars."""
+    return lumibot_data(symbol, attach_bars(info), interval)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+import pandas as pd
+
+
+class WalkForwardWindow(NamedTuple):
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def walk_forward_windows(
+    start: datetime,
+    end: datetime,
+    train_days: int,
+    test_days: int,
+    anchored: bool = False,
+) -> List[WalkForwardWindow]:
+    """
+    Consecutive test windows of test_days covering [start + train_days, end],
+    each preceded by its train window: the previous train_days when rolling,
+    everything since start when anchored. The last test window ends at end.
+    Windows are in UTC, naive bounds being taken as UTC.
+    """
+    if train_days <= 0 or test_days <= 0:
+        raise ValueError("Walk-forward windows need positive train and test days")
+    # The parsed -sd is naive while the default -ed is the aware current time
+    start, end = _utc(start), _utc(end)
+
+    windows = []
+    test_start = start + timedelta(days=train_days)
+    while test_start < end:
+        test_end = min(test_start + timedelta(days=test_days), end)
+        train_start = start if anchored else test_start - timedelta(days=train_days)
+        windows.append(WalkForwardWindow(train_start, test_start, test_start, test_end))
+        test_start = test_end
+    if not windows:
+        raise ValueError(
+            f"The range from {start:%Y-%m-%d} to {end:%Y-%m-%d} is shorter than "
+            f"one train window of {train_days} days"
+        )
+    return windows
+
+
+def _utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def stitch_equity(
+    curves: List[Optional[pd.Series]], budget: Optional[float] = None
+) -> pd.Series:
+    """
+    One equity curve compounding the returns of consecutive curves, as if
+    each one started with the final value of the previous one. Missing
+    curves are skipped.
+    """
+    stitched, value = [], budget
+    for curve in curves:
+        if curve is None or curve.empty:
+            continue
+        if value is None:
+            value = curve.iloc[0]
+        scaled = curve / curve.iloc[0] * value
+        if stitched:
+            # The first point of a window is the last point of the previous one
+            scaled = scaled.iloc[1:]
+        stitched.append(scaled)
+        value = scaled.iloc[-1] if len(scaled) else value
+    if not stitched:
+        return pd.Series(dtype=float, name="equity")
+    return pd.concat(stitched).rename("equity")
@@ -0,0 +1,56 @@
+from utils.bar_store import BAR_COLUMNS, BarStore
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class CountingDownloader:
+    """Minute bars of weekdays only, counting the downloads."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((start, end))
+        index = pd.date_range(start, end, freq="1min", inclusive="left")
+        index = index[index.dayofweek < 5]
+        values = np.arange(len(index), dtype="float64")
+        return pd.DataFrame({column: values for column in BAR_COLUMNS}, index=index)
+
+
+@pytest.fixture
+def downloader():
+    return CountingDownloader()
+
+
+def test_settled_weekend_is_downloaded_once(tmp_path, downloader):
+    store = BarStore("SPY", "1m", downloader, str(tmp_path))
+    saturday, sunday = "2024-01-06", "2024-01-07 23:59"
+
+    assert store.get(saturday, sunday).empty
+    assert store.get(saturday, sunday).empty
+    assert len(downloader.calls) == 1
+
+    # The covered weekend is also remembered across processes
+    reopened = BarStore("SPY", "1m", downloader, str(tmp_path))
+    assert reopened.get(saturday, sunday).empty
+    assert len(downloader.calls) == 1
+
+
+def test_recent_empty_span_is_downloaded_again(tmp_path, downloader):
+    store = BarStore("SPY", "1m", lambda *args: pd.DataFrame(), str(tmp_path))
+    end = pd.Timestamp.now(tz="UTC").floor("1min")
+    start = end - pd.Timedelta(hours=1)
+
+    store.get(start, end)
+    assert store.gaps(start, end) == [(start, end)]
+
+
+def test_weekdays_around_a_weekend(tmp_path, downloader):
+    store = BarStore("SPY", "1m", downloader, str(tmp_path))
+
+    bars = store.get("2024-01-05", "2024-01-09")
+    assert len(bars) == 2 * 24 * 60
+    assert (bars.index.dayofweek < 5).all()
+    assert store.get("2024-01-06", "2024-01-07 23:59").empty
+    assert len(downloader.calls) == 1
@@ -0,0 +1,209 @@
+"""
+The streaming indicators against the rolling pandas computations they
+replace, on a fixed random walk. The running sums are resynchronised once
+per window but still accumulate rounding between resyncs, so values are
+compared with a relative tolerance of 1e-9 (absolute 1e-12) instead of
+bit for bit.
+"""
+
+from utils.indicators import (
+    ATR,
+    BarStream,
+    Crossover,
+    EMA,
+    LogReturns,
+    RollingStd,
+    SMA,
+)
+import numpy as np
+import pandas as pd
+import pytest
+
+RTOL = 1e-9
+ATOL = 1e-12
+
+
+@pytest.fixture
+def bars() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 1000)))
+    spread = np.abs(rng.normal(0, 0.5, len(close)))
+    return pd.DataFrame(
+        {
+            "open": np.r_[close[0], close[:-1]],
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+        },
+        index=pd.date_range("2020-01-01", periods=len(close), freq="D", tz="UTC"),
+    )
+
+
+def _stream(indicator, values):
+    return [indicator.update(value) for value in values]
+
+
+def _assert_close(actual, expected):
+    np.testing.assert_allclose(
+        np.asarray(actual, dtype=float),
+        np.asarray(expected, dtype=float),
+        rtol=RTOL,
+        atol=ATOL,
+        equal_nan=True,
+    )
+
+
+@pytest.mark.parametrize("period", [1, 5, 20, 50])
+def test_sma_matches_rolling_mean(bars, period):
+    close = bars["close"]
+    _assert_close(
+        _stream(SMA(period, min_periods=period), close),
+        close.rolling(period).mean(),
+    )
+    _assert_close(
+        _stream(SMA(period), close), close.rolling(period, min_periods=1).mean()
+    )
+
+
+@pytest.mark.parametrize("period", [1, 12, 26])
+def test_ema_matches_ewm(bars, period):
+    close = bars["close"]
+    _assert_close(
+        _stream(EMA(period), close), close.ewm(span=period, adjust=False).mean()
+    )
+
+
+def test_log_returns_match_log_diff(bars):
+    close = bars["close"].to_numpy()
+    returns = _stream(LogReturns(), close)
+    assert returns[0] is None
+    _assert_close(returns[1:], np.diff(np.log(close)))
+
+
+@pytest.mark.parametrize("period", [2, 14, 30])
+@pytest.mark.parametrize("ddof", [0, 1])
+def test_rolling_std_matches_rolling_std(bars, period, ddof):
+    returns = np.log(bars["close"]).diff().dropna()
+    _assert_close(
+        _stream(RollingStd(period, ddof), returns),
+        returns.rolling(period, min_periods=ddof + 1).std(ddof=ddof),
+    )
+
+
+@pytest.mark.parametrize("period", [1, 14, 20])
+def test_atr_matches_rolling_true_range(bars, period):
+    prior_close = bars["close"].shift(1)
+    true_range = pd.concat(
+        [
+            bars["high"] - bars["low"],
+            (bars["high"] - prior_close).abs(),
+            (bars["low"] - prior_close).abs(),
+        ],
+        axis=1,
+    ).max(axis=1)
+
+    atr = ATR(period)
+    _assert_close(
+        [atr.update(bar.high, bar.low, bar.close) for bar in bars.itertuples()],
+        true_range.rolling(period).mean(),
+    )
+
+
+def _brute_force_crossings(fast, slow) -> list:
+    above = [f > s if not np.isnan(f - s) else None for f, s in zip(fast, slow)]
+    return [0] + [
+        int(now) - int(before) if before is not None and now is not None else 0
+        for before, now in zip(above, above[1:])
+    ]
+
+
+@pytest.mark.parametrize("revise", [False, True])
+def test_crossover_matches_brute_force(bars, revise):
+    close = bars["close"]
+    fast = close.rolling(5).mean().to_numpy()
+    slow = close.rolling(20).mean().to_numpy()
+
+    crossover = Crossover()
+    crossings = []
+    for f, s in zip(fast, slow):
+        if revise:
+            # A provisional value on the other side of the slow series
+            crossover.update(2 * s - f, s)
+        crossings.append(crossover.update(f, s, revise=revise))
+
+    expected = _brute_force_crossings(fast, slow)
+    assert crossings == expected
+    assert 1 in expected and -1 in expected
+
+
+@pytest.mark.parametrize("volatility_period", [2, 14, 30])
+def test_momentum_volatility_matches_numpy(bars, volatility_period):
+    """The momentum strategy's volatility over the closes of its period."""
+    close = bars["close"].to_numpy()
+    log_returns = LogReturns()
+    volatility = RollingStd(max(1, volatility_period - 1))
+
+    values = []
+    for end, value in enumerate(close, start=1):
+        log_return = log_returns.update(value)
+        if log_return is not None:
+            volatility.update(log_return)
+        if end >= volatility_period:
+            values.append(volatility.value)
+
+    _assert_close(
+        values,
+        [
+            np.std(np.diff(np.log(close[end - volatility_period : end])))
+            for end in range(volatility_period, len(close) + 1)
+        ],
+    )
+
+
+def test_revisions_replace_the_forming_value(bars):
+    close = bars["close"]
+    sma, std = SMA(20, min_periods=20), RollingStd(20)
+    for value in close:
+        # A first, provisional value of the bar is revised to its close
+        sma.update(value * 1.01)
+        std.update(value * 1.01)
+        sma.update(value, revise=True)
+        std.update(value, revise=True)
+    _assert_close([sma.value], close.rolling(20).mean().iloc[-1:])
+    _assert_close([std.value], close.rolling(20).std(ddof=0).iloc[-1:])
+
+
+def _polled_sma(visible, period: int = 20) -> SMA:
+    """An SMA fed by a BarStream over the bars visible at each poll."""
+    current = {}
+    stream = BarStream(lambda count: current["bars"].iloc[-count:], warmup=period * 3)
+    sma = None
+    for shown in visible:
+        current["bars"] = shown
+        reset, updates = stream.poll()
+        if reset:
+            sma = SMA(period, min_periods=period)
+        for bar, revise in updates:
+            sma.update(bar.close, revise)
+    return sma
+
+
+def test_bar_stream_feeds_each_bar_once(bars):
+    # The last bar of each poll is still forming and closes on the next one
+    visible = []
+    for end in range(100, len(bars) + 1):
+        shown = bars.iloc[:end].copy()
+        shown.iloc[-1, shown.columns.get_loc("close")] *= 1.01
+        visible.append(shown)
+    visible.append(bars)
+
+    sma = _polled_sma(visible)
+    _assert_close([sma.value], bars["close"].rolling(20).mean().iloc[-1:])
+
+
+def test_bar_stream_starts_over_after_missed_bars(bars):
+    # A gap longer than the lookback forces a warm-up from the fetched bars
+    visible = [bars.iloc[:200], bars.iloc[:201], bars.iloc[:400]]
+
+    sma = _polled_sma(visible)
+    _assert_close([sma.value], bars["close"].iloc[:400].rolling(20).mean().iloc[-1:])
@@ -0,0 +1,122 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sentiment.news_client import PAGE_LIMIT, NewsClient
+from urllib.parse import parse_qs, urlparse
+import json
+import threading
+import time
+import pytest
+
+ARTICLES = 120
+
+
+class NewsServer(ThreadingHTTPServer):
+    """Stand-in for the news endpoint, serving ARTICLES articles per symbol."""
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0):
+        super().__init__(("127.0.0.1", 0), NewsHandler)
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+
+class NewsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with server.lock:
+            server.requests.append(params)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+
+        offset = int(params.get("page_token", 0))
+        end = min(offset + int(params["limit"]), ARTICLES)
+        body = {
+            "news": [
+                {"id": i, "symbols": [params["symbols"]], "headline": f"Article {i}"}
+                for i in range(offset, end)
+            ],
+            "next_page_token": str(end) if end < ARTICLES else None,
+        }
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(request):
+    server = NewsServer(getattr(request, "param", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server: NewsServer, **kwargs) -> NewsClient:
+    host, port = server.server_address
+    return NewsClient("key", "secret", data_url=f"http://{host}:{port}", **kwargs)
+
+
+def _ids(news: list) -> list:
+    return [ev.__dict__["_raw"]["id"] for ev in news]
+
+
+def test_follows_pagination(server):
+    with _client(server) as client:
+        news = client("SPY", limit=None)
+
+    assert _ids(news) == list(range(ARTICLES))
+    assert [r.get("page_token") for r in server.requests] == [None, "50", "100"]
+    assert all(r["limit"] == str(PAGE_LIMIT) for r in server.requests)
+    assert server.requests[0]["symbols"] == "SPY"
+
+
+def test_stops_at_limit(server):
+    with _client(server) as client:
+        news = client("SPY", start="2024-01-01", end="2024-01-05", limit=70)
+
+    assert _ids(news) == list(range(70))
+    # The last page only asks for the articles still missing
+    assert [r["limit"] for r in server.requests] == ["50", "20"]
+    assert server.requests[0]["start"] == "2024-01-01"
+    assert server.requests[0]["end"] == "2024-01-05"
+
+
+def test_single_page_under_limit(server):
+    with _client(server) as client:
+        news = client("SPY", limit=10)
+
+    assert _ids(news) == list(range(10))
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("server", [0.05], indirect=True)
+def test_get_news_many_caps_concurrency(server):
+    calls = [{"symbol": f"S{i}", "limit": 5} for i in range(8)]
+    with _client(server, max_concurrency=2) as client:
+        results = client.get_news_many(calls)
+
+    assert [r[0].__dict__["_raw"]["symbols"] for r in results] == [
+        [call["symbol"]] for call in calls
+    ]
+    assert server.max_active == 2
+
+
+def test_close_stops_the_executor(server):
+    client = _client(server)
+    client.close()
+    with pytest.raises(RuntimeError):
+        client.get_news_many([{"symbol": "SPY"}])
@@ -0,0 +1,33 @@
+from datetime import datetime, time, timedelta, timezone
+from utils.walk_forward import walk_forward_windows
+import pytest
+
+
+def test_default_end_date():
+    # -sd parses to a naive date, and -ed defaults to the aware current time
+    start = datetime.combine(datetime(2024, 1, 1), time.min)
+    end = datetime.now(timezone.utc)
+
+    windows = walk_forward_windows(start, end, train_days=90, test_days=30)
+
+    assert windows[0].train_start == start.replace(tzinfo=timezone.utc)
+    assert windows[-1].test_end == end
+    for previous, window in zip(windows, windows[1:]):
+        assert window.test_start == previous.test_end
+
+
+def test_naive_bounds_are_utc():
+    start = datetime(2024, 1, 1)
+    end = datetime.combine(datetime(2024, 12, 31), time.max)
+
+    windows = walk_forward_windows(start, end, 180, 60, anchored=True)
+
+    assert all(window.train_start.tzinfo is timezone.utc for window in windows)
+    assert all(window.train_start == windows[0].train_start for window in windows)
+    assert windows[0].test_start - windows[0].train_start == timedelta(days=180)
+    assert windows[-1].test_end == end.replace(tzinfo=timezone.utc)
+
+
+def test_range_shorter_than_a_train_window():
+    with pytest.raises(ValueError):
+        walk_forward_windows(datetime(2024, 1, 1), datetime(2024, 2, 1), 90, 30)